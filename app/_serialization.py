@@ -0,0 +1,33 @@
+"""
+JSON serialization helpers for CloudPrintd.
+
+Uses orjson when available for significantly faster parsing and
+serialization, falling back to the standard library json module when
+orjson is not installed.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+
+    def loads(data: bytes) -> Any:
+        """Parse JSON from bytes."""
+        return orjson.loads(data)
+
+    def dumps(obj: Any, pretty: bool = False) -> bytes:
+        """Serialize an object to JSON bytes (compact unless pretty=True)."""
+        if pretty:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+        return orjson.dumps(obj)
+
+except ImportError:
+    def loads(data: bytes) -> Any:
+        """Parse JSON from bytes."""
+        return json.loads(data)
+
+    def dumps(obj: Any, pretty: bool = False) -> bytes:
+        """Serialize an object to JSON bytes (compact unless pretty=True)."""
+        if pretty:
+            return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
@@ -1,75 +1,201 @@
 """
 Configuration management for CloudPrintd.
 """
-import json
 import os
+import pickle
 import secrets
+import threading
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 
+from app._serialization import loads, dumps
+
+
+def _build_default_config() -> Dict[str, Any]:
+    """Build the default main configuration for a fresh install."""
+    return {
+        "api_version": "1.0.0",
+        "server": {
+            "host": "0.0.0.0",
+            "port": 8000,
+            "log_level": "info"
+        },
+        "security": {
+            "api_tokens": [],
+            "ip_whitelist_enabled": False,
+            "ip_whitelist": []
+        },
+        "connectivity": {
+            "method": "none",
+            "tunnel_token": "",
+            "tailscale_key": "",
+            "ddns_config": {},
+            "domain": ""
+        },
+        "system": {
+            "setup_completed": False,
+            "instance_id": secrets.token_hex(16)
+        }
+    }
+
 
 class ConfigManager:
-    """Manages application configuration files."""
-    
-    def __init__(self, config_dir: str = "config"):
+    """Manages application configuration files.
+
+    Reads are served from an in-process cache keyed by the file's stat
+    signature (st_mtime_ns and st_size), so steady-state callers such as
+    ``get_config()`` and ``get_printers()`` cost a single ``stat()`` with
+    no JSON parsing; external edits to the files are still picked up.
+    Mutators re-read fresh state, write atomically, and repopulate the
+    cache. A ``threading.Lock`` guards the cache and every write path,
+    keeping the manager safe to share across worker threads.
+    """
+
+    # Chunk size for writing serialized payloads to disk
+    _WRITE_CHUNK = 1 << 20
+
+    def __init__(self, config_dir: str = "config", pretty: bool = False):
         """
         Initialise configuration manager.
         
         Args:
             config_dir: Path to configuration directory
+            pretty: Write indented JSON for human editing (slower, larger)
         """
         self.config_dir = Path(config_dir)
+        self.pretty = pretty
         self.config_file = self.config_dir / "config.json"
-        self.printers_file = self.config_dir / "printers.json"
+        # The printers registry is machine-only data: use the msgpack
+        # binary encoding when available, JSON-Lines otherwise
+        if msgpack is not None:
+            self.printers_file = self.config_dir / "printers.msgpack"
+        else:
+            self.printers_file = self.config_dir / "printers.jsonl"
+        self.tokens_file = self.config_dir / "tokens.json"
         self.update_file = self.config_dir / "update.json"
-        
-        # Ensure config directory exists
-        self.config_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Initialise configs if they don't exist
-        self._initialise_configs()
-    
+        # Sidecar with derived hot fields (token set, setup flag) so a
+        # fresh process can serve the hot accessors without JSON parsing
+        self.hot_file = self.config_dir / ".hotcache"
+
+        # Parsed-file cache keyed on stat identity, so unchanged files
+        # are served without any IO or JSON parsing
+        self._cache: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
+        self._cache_lock = threading.Lock()
+
+        # Monotonic change counter, bumped whenever any config file is
+        # written or reparsed. Callers can compare it against a stored
+        # value to skip re-deriving state while nothing has changed.
+        self.config_version = 0
+
+        # Active batch state: snapshots being mutated and which of them
+        # need persisting when the batch exits
+        self._batch: Optional[Dict[Path, Dict[str, Any]]] = None
+        self._batch_dirty: set = set()
+
+        # Derived index over the main config for O(1) token validation
+        self._token_set: frozenset = frozenset()
+
+        # Long-lived read descriptors, one per config file, so cache
+        # misses pay a pread instead of open/read/close
+        self._fds: Dict[Path, int] = {}
+
+        # In-process view of the hot-field sidecar
+        self._hot_cache: Optional[Dict[str, Any]] = None
+        self._hot_key: Optional[int] = None
+
+        # Per-section serialized bytes for the main config, so partial
+        # updates only re-encode the sections that actually changed
+        self._section_bytes: Dict[str, Tuple[Any, bytes]] = {}
+
+        # Prebuilt (path, temp, lock) strings so hot write paths avoid
+        # per-call pathlib allocations
+        self._path_strs: Dict[Path, Tuple[str, str, str]] = {
+            p: (str(p), f"{p}.tmp", f"{p}.lock")
+            for p in (self.config_file, self.printers_file,
+                      self.tokens_file, self.update_file, self.hot_file)
+        }
+
+        # Filesystem bootstrap is deferred to the first real access so
+        # constructing a ConfigManager stays cheap
+        self._dir_fd: Optional[int] = None
+        self._initialised = False
+        self._init_lock = threading.Lock()
+
+    def _ensure_initialised(self) -> None:
+        """Run the one-time filesystem bootstrap on first access."""
+        if self._initialised:
+            return
+        with self._init_lock:
+            if self._initialised:
+                return
+            # Ensure config directory exists (isdir check avoids the
+            # mkdir syscall on the common already-present path)
+            if not os.path.isdir(self.config_dir):
+                self.config_dir.mkdir(parents=True, exist_ok=True)
+
+            # Directory fd for durable renames (fsync after os.replace)
+            if hasattr(os, 'O_DIRECTORY'):
+                self._dir_fd = os.open(str(self.config_dir), os.O_RDONLY | os.O_DIRECTORY)
+
+            # Initialise configs if they don't exist
+            self._initialise_configs()
+            self._initialised = True
+
     def _initialise_configs(self) -> None:
         """Initialise configuration files with defaults if they don't exist."""
+        # One scandir pass replaces a stat syscall per existence check
+        existing = {entry.name for entry in os.scandir(self.config_dir)}
+
         # Main config
-        if not self.config_file.exists():
-            defaults_file = self.config_dir / "defaults.json"
-            if defaults_file.exists():
-                defaults = self._load_json(defaults_file)
+        if self.config_file.name not in existing:
+            if "defaults.json" in existing:
+                defaults = self._load_json(self.config_dir / "defaults.json")
             else:
-                defaults = {
-                    "api_version": "1.0.0",
-                    "server": {
-                        "host": "0.0.0.0",
-                        "port": 8000,
-                        "log_level": "info"
-                    },
-                    "security": {
-                        "api_tokens": [],
-                        "ip_whitelist_enabled": False,
-                        "ip_whitelist": []
-                    },
-                    "connectivity": {
-                        "method": "none",
-                        "tunnel_token": "",
-                        "tailscale_key": "",
-                        "ddns_config": {},
-                        "domain": ""
-                    },
-                    "system": {
-                        "setup_completed": False,
-                        "instance_id": secrets.token_hex(16)
-                    }
-                }
+                # Built lazily: includes a fresh instance_id, so only
+                # generate it when a config file actually needs creating
+                defaults = _build_default_config()
             self._save_json(self.config_file, defaults)
-        
-        # Printers config
-        if not self.printers_file.exists():
-            self._save_json(self.printers_file, {"printers": {}})
-        
+
+        # Printers config; migrate any legacy registry format
+        if self.printers_file.name not in existing:
+            legacy = next(
+                (self.config_dir / name
+                 for name in ("printers.jsonl", "printers.json")
+                 if name != self.printers_file.name and name in existing),
+                None
+            )
+            if legacy is not None:
+                self._save_json(self.printers_file, self._parse_legacy_printers(legacy))
+            else:
+                self._save_json(self.printers_file, {"printers": {}})
+
+        # API tokens live in their own small file so the hot auth path
+        # and token writes never touch the full config payload
+        if self.tokens_file.name not in existing:
+            tokens = []
+            if self.config_file.name in existing:
+                # Migrate tokens out of config["security"] on first run
+                config = self._load_json_fresh(self.config_file)
+                tokens = config.get("security", {}).get("api_tokens", [])
+                if tokens:
+                    config["security"]["api_tokens"] = []
+                    self._save_json(self.config_file, config)
+            self._save_json(self.tokens_file, tokens)
+
         # Update config
-        if not self.update_file.exists():
+        if self.update_file.name not in existing:
             update_defaults = {
                 "auto_update": False,
                 "channel": "stable",
@@ -79,30 +205,283 @@ class ConfigManager:
             }
             self._save_json(self.update_file, update_defaults)
     
+    @staticmethod
+    def _stat_key(file_path: Path) -> int:
+        """Build a cache invalidation key from a file's stat info."""
+        st = os.stat(file_path)
+        return st.st_mtime_ns ^ st.st_size
+
+    def _path_pair(self, file_path: Path) -> Tuple[str, str, str]:
+        """Get prebuilt (path, temp path, lock path) strings for a file."""
+        pair = self._path_strs.get(file_path)
+        if pair is None:
+            pair = (str(file_path), f"{file_path}.tmp", f"{file_path}.lock")
+            self._path_strs[file_path] = pair
+        return pair
+
+    def _read_file_bytes(self, file_path: Path) -> bytes:
+        """
+        Read a file's contents via a long-lived descriptor.
+
+        Reuses one fd per file and preads from offset 0, avoiding the
+        open/fstat/read/close syscall round trip of a fresh open. The
+        descriptor is reopened if the file was replaced on disk.
+        """
+        fd = self._fds.get(file_path)
+        if fd is not None and os.fstat(fd).st_ino != os.stat(file_path).st_ino:
+            # File was atomically replaced; the fd points at the old inode
+            os.close(fd)
+            fd = None
+        if fd is None:
+            fd = os.open(str(file_path), os.O_RDONLY)
+            self._fds[file_path] = fd
+        st = os.fstat(fd)
+        return os.pread(fd, st.st_size, 0)
+
     def _load_json(self, file_path: Path) -> Dict[str, Any]:
-        """Load JSON from file."""
+        """Load JSON from file, using the cache when the file is unchanged."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
+            key = self._stat_key(file_path)
+            cached = self._cache.get(file_path)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            data = self._parse_file(file_path, self._read_file_bytes(file_path))
+            with self._cache_lock:
+                self._cache[file_path] = (key, data)
+                self._refresh_derived(file_path, data)
+                self.config_version += 1
+            return data
+        except FileNotFoundError:
+            # Propagate directly so callers can use absence as a signal
+            raise
+        except ValueError:
+            # JSON decode errors (orjson and stdlib both subclass ValueError)
+            raise
+        except OSError as e:
             raise RuntimeError(f"Failed to load {file_path}: {e}")
-    
-    def _save_json(self, file_path: Path, data: Dict[str, Any]) -> None:
+
+    def _refresh_derived(self, file_path: Path, data: Any) -> None:
+        """Rebuild derived lookup structures when a file is (re)parsed."""
+        if file_path == self.tokens_file:
+            self._token_set = frozenset(data)
+
+    def _load_json_fresh(self, file_path: Path) -> Dict[str, Any]:
+        """
+        Load JSON from disk, bypassing the cache.
+
+        Mutating methods use this so writes are always based on the
+        on-disk source of truth and never modify a cached dict in place.
+        """
+        try:
+            return self._parse_file(file_path, self._read_file_bytes(file_path))
+        except (FileNotFoundError, ValueError):
+            raise
+        except OSError as e:
+            raise RuntimeError(f"Failed to load {file_path}: {e}")
+
+    @staticmethod
+    def _parse_printers_jsonl(raw: bytes) -> Dict[str, Any]:
+        """Parse a JSON-Lines printers registry into the dict shape."""
+        printers: Dict[str, Any] = {}
+        for line in raw.splitlines():
+            if line.strip():
+                entry = loads(line)
+                printers[entry["id"]] = entry["config"]
+        return {"printers": printers}
+
+    def _parse_legacy_printers(self, legacy: Path) -> Dict[str, Any]:
+        """Parse a legacy printers registry (printers.json or .jsonl)."""
+        raw = self._read_file_bytes(legacy)
+        if legacy.suffix == ".jsonl":
+            return self._parse_printers_jsonl(raw)
+        return loads(raw)
+
+    def _parse_file(self, file_path: Path, raw: bytes) -> Dict[str, Any]:
+        """Parse raw file bytes according to the file's format."""
+        if file_path == self.printers_file:
+            if msgpack is not None:
+                return {"printers": msgpack.unpackb(raw, raw=False) if raw else {}}
+            return self._parse_printers_jsonl(raw)
+        return loads(raw)
+
+    def _encode_section(self, name: str, value: Any) -> bytes:
+        """Encode one top-level config section, reusing unchanged bytes."""
+        cached = self._section_bytes.get(name)
+        if cached is not None and cached[0] == value:
+            return cached[1]
+        encoded = dumps(value)
+        self._section_bytes[name] = (value, encoded)
+        return encoded
+
+    def _serialize_file(self, file_path: Path, data: Dict[str, Any]) -> bytes:
+        """Serialize a parsed dict according to the file's format."""
+        if file_path == self.printers_file:
+            if msgpack is not None:
+                return msgpack.packb(data.get("printers", {}), use_bin_type=True)
+            return b''.join(
+                dumps({"id": pid, "config": cfg}) + b'\n'
+                for pid, cfg in data.get("printers", {}).items()
+            )
+        if file_path == self.config_file and not self.pretty:
+            # Assemble the document from per-section bytes; partial
+            # updates skip re-encoding every untouched section
+            return b'{' + b','.join(
+                dumps(key) + b':' + self._encode_section(key, value)
+                for key, value in data.items()
+            ) + b'}'
+        return dumps(data, pretty=self.pretty)
+
+    @contextmanager
+    def _locked(self, file_path: Path):
+        """
+        Hold an exclusive advisory lock for a read-modify-write cycle.
+
+        Serialises concurrent writers (including other processes) so
+        load-modify-save never loses another writer's update. Inside a
+        batch the lock is deferred to the batch flush.
+        """
+        if fcntl is None or self._batch is not None:
+            yield
+            return
+        fd = os.open(self._path_pair(file_path)[2], os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    @contextmanager
+    def batch(self):
+        """
+        Batch multiple config mutations into one atomic write per file.
+
+        Mutating methods called inside the context operate on in-memory
+        snapshots; each touched file is serialized and renamed once on
+        exit instead of once per mutation. Nothing is written if the
+        block raises.
+        """
+        self._ensure_initialised()
+        if self._batch is not None:
+            # Already inside a batch; join the outer one
+            yield self
+            return
+        self._batch = {}
+        self._batch_dirty = set()
+        try:
+            yield self
+            snapshot, dirty = self._batch, self._batch_dirty
+            self._batch = None
+            for file_path in dirty:
+                with self._locked(file_path):
+                    self._save_json(file_path, snapshot[file_path], sync_dir=False)
+            # One directory fsync covers every rename in the batch
+            if dirty and self._dir_fd is not None:
+                os.fsync(self._dir_fd)
+        finally:
+            self._batch = None
+            self._batch_dirty = set()
+
+    def _mutable(self, file_path: Path) -> Dict[str, Any]:
+        """Get a dict safe to mutate, honouring any active batch."""
+        if self._batch is not None:
+            if file_path not in self._batch:
+                self._batch[file_path] = self._load_json_fresh(file_path)
+            return self._batch[file_path]
+        return self._load_json_fresh(file_path)
+
+    def _persist(self, file_path: Path, data: Dict[str, Any]) -> None:
+        """Persist a mutated dict, deferring the write inside a batch."""
+        if self._batch is not None:
+            self._batch_dirty.add(file_path)
+            return
+        self._save_json(file_path, data)
+
+    def _write_hot_cache(self) -> None:
+        """
+        Persist derived hot fields (.hotcache sidecar).
+
+        The payload records the stat keys of its source files; readers
+        ignore it if either source changed since it was written, so
+        manual edits can never be masked by a stale sidecar.
+        """
+        try:
+            config = self._load_json(self.config_file)
+            tokens = self._load_json(self.tokens_file)
+            payload = pickle.dumps({
+                "sources": (self._stat_key(self.config_file),
+                            self._stat_key(self.tokens_file)),
+                "tokens": frozenset(tokens),
+                "setup_completed": bool(config.get("system", {}).get("setup_completed", False)),
+            })
+            self._atomic_write_bytes(self.hot_file, payload, sync_dir=False)
+        except (OSError, RuntimeError):
+            # The sidecar is advisory; hot readers fall back to JSON
+            pass
+
+    def _load_hot_cache(self) -> Optional[Dict[str, Any]]:
+        """Load the hot-field sidecar, or None if missing or stale."""
+        try:
+            key = self._stat_key(self.hot_file)
+            if self._hot_cache is None or self._hot_key != key:
+                data = pickle.loads(self._read_file_bytes(self.hot_file))
+                self._hot_cache, self._hot_key = data, key
+            hot = self._hot_cache
+            if hot.get("sources") != (self._stat_key(self.config_file),
+                                      self._stat_key(self.tokens_file)):
+                return None
+            return hot
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _atomic_write_bytes(self, file_path: Path, payload: bytes,
+                            sync_dir: bool = True) -> None:
+        """Durably write bytes: fsync'd temp file, atomic rename, dir fsync."""
+        path_str, tmp_str, _ = self._path_pair(file_path)
+        fd = os.open(tmp_str, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            # Write in page-cache-sized chunks; a single os.write of a
+            # multi-megabyte registry forces one giant user->kernel copy
+            mv = memoryview(payload)
+            for offset in range(0, len(mv), self._WRITE_CHUNK):
+                os.write(fd, mv[offset:offset + self._WRITE_CHUNK])
+            # Flush file contents before the rename so a crash can't
+            # land the new name with empty contents
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_str, path_str)
+        # Drop any read fd for the old inode; it is reopened on next read
+        stale_fd = self._fds.pop(file_path, None)
+        if stale_fd is not None:
+            os.close(stale_fd)
+        if sync_dir and self._dir_fd is not None:
+            os.fsync(self._dir_fd)
+
+    def _save_json(self, file_path: Path, data: Dict[str, Any],
+                   sync_dir: bool = True) -> None:
         """Save JSON to file atomically."""
-        temp_file = file_path.with_suffix('.tmp')
+        tmp_str = self._path_pair(file_path)[1]
         try:
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            # Atomic rename
-            temp_file.replace(file_path)
-        except Exception as e:
-            if temp_file.exists():
-                temp_file.unlink()
+            self._atomic_write_bytes(file_path, self._serialize_file(file_path, data),
+                                     sync_dir=sync_dir)
+            # Pre-populate the cache so the next read is free
+            with self._cache_lock:
+                self._cache[file_path] = (self._stat_key(file_path), data)
+                self._refresh_derived(file_path, data)
+                self.config_version += 1
+            if file_path in (self.config_file, self.tokens_file):
+                self._write_hot_cache()
+        except OSError as e:
+            if os.path.exists(tmp_str):
+                os.unlink(tmp_str)
             raise RuntimeError(f"Failed to save {file_path}: {e}")
     
     def get_config(self) -> Dict[str, Any]:
         """Get main configuration."""
-        return self._load_json(self.config_file)
+        self._ensure_initialised()
+        # Shallow copy so callers can't mutate the cached dict in place
+        return dict(self._load_json(self.config_file))
     
     def update_config(self, updates: Dict[str, Any]) -> None:
         """
@@ -111,13 +490,19 @@ class ConfigManager:
         Args:
             updates: Dictionary of configuration updates
         """
-        config = self.get_config()
-        config.update(updates)
-        self._save_json(self.config_file, config)
+        self._ensure_initialised()
+        with self._locked(self.config_file):
+            config = self._mutable(self.config_file)
+            changed = {k: v for k, v in updates.items() if config.get(k) != v}
+            if not changed:
+                return
+            config.update(changed)
+            self._persist(self.config_file, config)
     
     def get_printers(self) -> Dict[str, Any]:
         """Get printers configuration."""
-        return self._load_json(self.printers_file)
+        self._ensure_initialised()
+        return dict(self._load_json(self.printers_file))
     
     def add_printer(self, printer_id: str, printer_config: Dict[str, Any]) -> None:
         """
@@ -127,9 +512,29 @@ class ConfigManager:
             printer_id: Unique printer identifier
             printer_config: Printer configuration dictionary
         """
-        printers = self.get_printers()
-        printers["printers"][printer_id] = printer_config
-        self._save_json(self.printers_file, printers)
+        self._ensure_initialised()
+        if self._batch is not None:
+            printers = self._mutable(self.printers_file)
+            printers["printers"][printer_id] = printer_config
+            self._persist(self.printers_file, printers)
+            return
+        with self._locked(self.printers_file):
+            existing = self._load_json_fresh(self.printers_file)["printers"]
+            if msgpack is None and printer_id not in existing:
+                # JSON-Lines fallback: a new printer appends one line
+                # instead of re-encoding the registry
+                line = dumps({"id": printer_id, "config": printer_config}) + b'\n'
+                with open(self.printers_file, 'ab') as f:
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                updated = {"printers": {**existing, printer_id: printer_config}}
+                with self._cache_lock:
+                    self._cache[self.printers_file] = (self._stat_key(self.printers_file), updated)
+                    self.config_version += 1
+                return
+            self._save_json(self.printers_file,
+                            {"printers": {**existing, printer_id: printer_config}})
     
     def update_printer(self, printer_id: str, printer_config: Dict[str, Any]) -> None:
         """
@@ -139,9 +544,11 @@ class ConfigManager:
             printer_id: Unique printer identifier
             printer_config: Updated printer configuration dictionary
         """
-        printers = self.get_printers()
-        printers["printers"][printer_id] = printer_config
-        self._save_json(self.printers_file, printers)
+        self._ensure_initialised()
+        with self._locked(self.printers_file):
+            printers = self._mutable(self.printers_file)
+            printers["printers"][printer_id] = printer_config
+            self._persist(self.printers_file, printers)
     
     def remove_printer(self, printer_id: str) -> bool:
         """
@@ -153,16 +560,19 @@ class ConfigManager:
         Returns:
             True if printer was removed, False if not found
         """
-        printers = self.get_printers()
-        if printer_id in printers["printers"]:
-            del printers["printers"][printer_id]
-            self._save_json(self.printers_file, printers)
-            return True
-        return False
+        self._ensure_initialised()
+        with self._locked(self.printers_file):
+            printers = self._mutable(self.printers_file)
+            if printer_id in printers["printers"]:
+                del printers["printers"][printer_id]
+                self._persist(self.printers_file, printers)
+                return True
+            return False
     
     def get_update_config(self) -> Dict[str, Any]:
         """Get update configuration."""
-        return self._load_json(self.update_file)
+        self._ensure_initialised()
+        return dict(self._load_json(self.update_file))
     
     def update_update_config(self, updates: Dict[str, Any]) -> None:
         """
@@ -171,9 +581,14 @@ class ConfigManager:
         Args:
             updates: Dictionary of update configuration changes
         """
-        config = self.get_update_config()
-        config.update(updates)
-        self._save_json(self.update_file, config)
+        self._ensure_initialised()
+        with self._locked(self.update_file):
+            config = self._mutable(self.update_file)
+            changed = {k: v for k, v in updates.items() if config.get(k) != v}
+            if not changed:
+                return
+            config.update(changed)
+            self._persist(self.update_file, config)
     
     def generate_api_token(self) -> str:
         """
@@ -182,14 +597,12 @@ class ConfigManager:
         Returns:
             The generated token
         """
+        self._ensure_initialised()
         token = secrets.token_urlsafe(32)
-        config = self.get_config()
-        if "security" not in config:
-            config["security"] = {}
-        if "api_tokens" not in config["security"]:
-            config["security"]["api_tokens"] = []
-        config["security"]["api_tokens"].append(token)
-        self._save_json(self.config_file, config)
+        with self._locked(self.tokens_file):
+            tokens = self._mutable(self.tokens_file)
+            tokens.append(token)
+            self._persist(self.tokens_file, tokens)
         return token
     
     def validate_token(self, token: str) -> bool:
@@ -202,19 +615,47 @@ class ConfigManager:
         Returns:
             True if token is valid
         """
-        config = self.get_config()
-        tokens = config.get("security", {}).get("api_tokens", [])
-        return token in tokens
+        self._ensure_initialised()
+        hot = self._load_hot_cache()
+        if hot is not None:
+            return token in hot["tokens"]
+        # Refresh the cache (and derived token set) if the file changed
+        self._load_json(self.tokens_file)
+        return token in self._token_set
     
+    def get_api_tokens(self) -> list:
+        """Get the list of API tokens."""
+        self._ensure_initialised()
+        return list(self._load_json(self.tokens_file))
+
+    def set_api_tokens(self, tokens: list) -> None:
+        """
+        Replace the stored API token list.
+
+        Args:
+            tokens: Full replacement list of tokens
+        """
+        self._ensure_initialised()
+        with self._locked(self.tokens_file):
+            self._persist(self.tokens_file, list(tokens))
+
     def is_setup_completed(self) -> bool:
         """Check if initial setup is completed."""
+        self._ensure_initialised()
+        hot = self._load_hot_cache()
+        if hot is not None:
+            return hot["setup_completed"]
         config = self.get_config()
         return config.get("system", {}).get("setup_completed", False)
     
     def mark_setup_completed(self) -> None:
         """Mark initial setup as completed."""
-        config = self.get_config()
-        if "system" not in config:
-            config["system"] = {}
-        config["system"]["setup_completed"] = True
-        self._save_json(self.config_file, config)
+        self._ensure_initialised()
+        with self._locked(self.config_file):
+            config = self._mutable(self.config_file)
+            if config.get("system", {}).get("setup_completed") is True:
+                return
+            if "system" not in config:
+                config["system"] = {}
+            config["system"]["setup_completed"] = True
+            self._persist(self.config_file, config)
@@ -2,20 +2,35 @@
 CloudPrintd FastAPI Application
 Main entry point for the print server API.
 """
+import asyncio
+import hmac
+import itertools
 import logging
 import os
 import secrets
 import time
-from datetime import datetime
+from collections import defaultdict, deque
+from functools import partial
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Request, Depends, BackgroundTasks, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.security import HTTPBearer
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
+try:
+    import orjson  # noqa: F401 - presence check for ORJSONResponse
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    DefaultResponse = JSONResponse
+from packaging.version import InvalidVersion, Version
+
 from app.models import (
     PrintRequest, PrintResponse, PrinterInfo, PrinterConfig, PrinterStatus,
     DiscoveredPrinter, HealthResponse, StatsResponse, AddPrinterRequest,
@@ -24,8 +39,8 @@ from app.models import (
 from app.config import ConfigManager
 from app.security import SecurityManager, verify_token, verify_ip_whitelist
 from app.printer import (
-    send_zpl_raw, send_to_cups, check_printer_status,
-    probe_zebra_printer, discover_zebra_printers
+    send_zpl_raw, send_to_cups, send_to_cups_batched, prune_batch_queues,
+    check_printer_status, probe_zebra_printer, discover_zebra_printers
 )
 from update_manager.manager import UpdateManager
 
@@ -38,21 +53,202 @@ logger = logging.getLogger(__name__)
 
 # Application state
 app_start_time = time.time()
-job_stats = {
-    "total_jobs": 0,
-    "successful_jobs": 0,
-    "failed_jobs": 0,
-    "jobs_today": 0,
-    "by_printer": {},
-    "last_reset": datetime.utcnow().date().isoformat()
-}
+
+# Cap concurrent printer status probes so large fleets don't exhaust sockets
+_status_semaphore = asyncio.Semaphore(32)
+
+
+async def check_status_bounded(printer_config: Dict) -> str:
+    """Check printer status under the shared concurrency cap."""
+    async with _status_semaphore:
+        return await check_printer_status(printer_config)
+
+
+# Short-TTL status cache so polling endpoints reuse recent probe results
+STATUS_CACHE_TTL = float(os.getenv("STATUS_CACHE_TTL", "5"))
+_status_cache: Dict[tuple, tuple] = {}
+
+
+def _status_cache_key(printer_config: Dict) -> tuple:
+    """Build the cache key identifying a printer's probe target."""
+    if printer_config.get("type") == PrinterType.CUPS:
+        return ("cups", printer_config.get("cups_name"))
+    return (printer_config.get("ip"), printer_config.get("port", 9100))
+
+
+# In-flight probes keyed like the cache, so a burst of concurrent polls
+# shares one probe per printer instead of opening duplicate sockets
+_inflight_probes: Dict[tuple, asyncio.Task] = {}
+
+
+async def cached_check_status(printer_config: Dict) -> str:
+    """Check printer status, reusing a result probed within the TTL."""
+    key = _status_cache_key(printer_config)
+    cached = _status_cache.get(key)
+    if cached is not None and time.monotonic() - cached[1] < STATUS_CACHE_TTL:
+        return cached[0]
+    
+    # Single-flight: join a probe already in progress for this printer
+    task = _inflight_probes.get(key)
+    if task is not None:
+        return await task
+    
+    task = asyncio.ensure_future(check_status_bounded(printer_config))
+    _inflight_probes[key] = task
+    try:
+        result = await task
+    finally:
+        _inflight_probes.pop(key, None)
+    _status_cache[key] = (result, time.monotonic())
+    return result
+
+
+def _invalidate_status_cache() -> None:
+    """Drop cached status results after the printer set changes."""
+    _status_cache.clear()
+
+
+SETUP_STATUS_TTL = float(os.getenv("SETUP_STATUS_TTL", "5"))
+_setup_status_cache: Optional[tuple] = None  # (payload, expires_at)
+
+
+def _invalidate_setup_status_cache() -> None:
+    """Drop the cached setup status after setup state changes."""
+    global _setup_status_cache
+    _setup_status_cache = None
+
+
+# Per-printer send handlers resolved at configuration time, so the hot
+# print path is one dict lookup instead of config reads and a type branch
+_print_handlers: Dict[str, tuple] = {}
+
+
+def _build_print_handler(printer_config: Dict) -> Optional[tuple]:
+    """Resolve a printer config to a (send callable, needs_job_name) pair."""
+    printer_type = printer_config.get("type")
+    if printer_type == PrinterType.ZEBRA_RAW:
+        ip = printer_config.get("ip")
+        if not ip:
+            return None
+        return partial(send_zpl_raw, ip, printer_config.get("port", 9100)), False
+    if printer_type == PrinterType.CUPS:
+        cups_name = printer_config.get("cups_name")
+        if not cups_name:
+            return None
+        batch_window_ms = printer_config.get("batch_window_ms")
+        if batch_window_ms:
+            return partial(send_to_cups_batched, cups_name,
+                           batch_window_ms=batch_window_ms), True
+        return partial(send_to_cups, cups_name), True
+    return None
+
+
+def _rebuild_print_handlers() -> None:
+    """Rebuild the handler registry from the stored printer configs."""
+    handlers = {}
+    batched_cups_names = set()
+    for printer_id, printer_config in config_manager.get_printers().get("printers", {}).items():
+        handler = _build_print_handler(printer_config)
+        if handler is not None:
+            handlers[printer_id] = handler
+            if (printer_config.get("type") == PrinterType.CUPS
+                    and printer_config.get("batch_window_ms")):
+                batched_cups_names.add(printer_config["cups_name"])
+    _print_handlers.clear()
+    _print_handlers.update(handlers)
+    # Retire coalescing queues for printers that were removed or had
+    # batching disabled; their drainer tasks would otherwise park on
+    # queue.get() forever
+    prune_batch_queues(batched_cups_names)
+
+
+# Debounced token persistence: rapid successive deletions collapse into
+# one tokens.json write shortly after the last change. A deleted token
+# therefore stays valid for up to TOKEN_FLUSH_DELAY seconds.
+TOKEN_FLUSH_DELAY = 0.2
+_pending_tokens: Optional[List[str]] = None
+_token_flush_handle: Optional[asyncio.TimerHandle] = None
+
+
+def _current_tokens() -> List[str]:
+    """Return the token list, including not-yet-flushed deletions."""
+    if _pending_tokens is not None:
+        return list(_pending_tokens)
+    return config_manager.get_api_tokens()
+
+
+def _flush_tokens() -> None:
+    """Persist the pending token list to disk.
+
+    Safe to call ahead of schedule (e.g. before a write that bypasses
+    the staging layer); cancelling an already-fired timer is a no-op.
+    """
+    global _pending_tokens, _token_flush_handle
+    if _token_flush_handle is not None:
+        _token_flush_handle.cancel()
+        _token_flush_handle = None
+    pending = _pending_tokens
+    if pending is None:
+        return
+    _pending_tokens = None
+    config_manager.set_api_tokens(pending)
+    # Drop the whole validation cache now that the list is persisted:
+    # a lookup during the debounce window re-validated against the
+    # stale tokens.json and may have re-cached a deleted token
+    security_manager.invalidate_token()
+
+
+def _schedule_token_flush(tokens: List[str]) -> None:
+    """Stage a token list and schedule a deduplicated flush."""
+    global _pending_tokens, _token_flush_handle
+    _pending_tokens = tokens
+    if _token_flush_handle is None:
+        _token_flush_handle = asyncio.get_running_loop().call_later(
+            TOKEN_FLUSH_DELAY, _flush_tokens
+        )
+
+
+# Job statistics kept as itertools.count objects: next() is a single
+# GIL-atomic C call, so update_stats needs no lock
+_total_jobs = itertools.count()
+_successful_jobs = itertools.count()
+_failed_jobs = itertools.count()
+_jobs_today = itertools.count()
+_jobs_by_printer = defaultdict(itertools.count)
+_last_reset_date = datetime.now(timezone.utc).date()
+_last_reset = _last_reset_date.isoformat()
+_last_rollover_check = time.time()
+
+
+def _counter_value(counter) -> int:
+    """Read a count object's next value without consuming it."""
+    return counter.__reduce__()[1][0]
+
+
+def stats_snapshot() -> Dict[str, object]:
+    """Build a statistics dict from the live counters."""
+    return {
+        "total_jobs": _counter_value(_total_jobs),
+        "successful_jobs": _counter_value(_successful_jobs),
+        "failed_jobs": _counter_value(_failed_jobs),
+        "jobs_today": _counter_value(_jobs_today),
+        "by_printer": {
+            printer_id: _counter_value(counter)
+            for printer_id, counter in _jobs_by_printer.items()
+        }
+    }
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     logger.info("CloudPrintd starting up...")
+    _rebuild_print_handlers()
     yield
+    # Persist any staged token changes before the process exits
+    _flush_tokens()
+    # Release the update manager's pooled HTTP connections
+    await update_manager.aclose()
     logger.info("CloudPrintd shutting down...")
 
 
@@ -61,7 +257,8 @@ app = FastAPI(
     title="CloudPrintd Print Server",
     description="Self-hosted print server for Salesforce cloud to on-site printers",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=DefaultResponse
 )
 
 # Add CORS middleware
@@ -84,6 +281,10 @@ from app.routers.network import router as network_router
 app.include_router(network_router, prefix="/api/v1")
 
 
+# Bearer-token extractor, instantiated once rather than per request
+_bearer = HTTPBearer()
+
+
 # Dependency for authentication
 async def require_auth(request: Request) -> str:
     """Dependency that requires authentication."""
@@ -95,39 +296,72 @@ async def require_auth(request: Request) -> str:
         return "setup_mode"
     
     # Verify token
-    from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-    security = HTTPBearer()
-    credentials = await security(request)
-    return await verify_token(credentials, security_manager)
+    credentials = await _bearer(request)
+    token = await verify_token(credentials, security_manager)
+    # Stash the verified token so downstream code doesn't re-verify
+    request.state.token = token
+    return token
 
 
 # Helper functions
+def _tail_log_file(log_file: Path, lines: int) -> List[str]:
+    """Read the last N lines of a log file without loading it whole."""
+    # deque(maxlen=N) keeps only the tail while iterating lazily in C
+    with open(log_file, 'r') as f:
+        return list(deque(f, maxlen=lines))
+
+
+def _version_sort_key(version: str) -> Version:
+    """Parse a version string for sorting, treating unparseable ones as oldest."""
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return Version("0")
+
+
+async def parse_print_request(raw_request: Request) -> PrintRequest:
+    """Parse the print body directly with pydantic-core's JSON parser.
+    
+    Skips the json.loads -> dict -> model_validate round trip, which
+    matters for large base64 PDF payloads.
+    """
+    body = await raw_request.body()
+    try:
+        return PrintRequest.model_validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors()) from e
+
+
 def generate_job_id() -> str:
     """Generate a unique job ID."""
     return f"job_{int(time.time())}_{secrets.token_hex(4)}"
 
 
+# Memoized /stats response, rebuilt only after the counters change
+_stats_response: Optional[StatsResponse] = None
+
+
 def update_stats(printer_id: str, success: bool) -> None:
     """Update job statistics."""
-    global job_stats
-    
-    # Reset daily stats if needed
-    today = datetime.utcnow().date().isoformat()
-    if job_stats["last_reset"] != today:
-        job_stats["jobs_today"] = 0
-        job_stats["last_reset"] = today
-    
-    job_stats["total_jobs"] += 1
-    job_stats["jobs_today"] += 1
-    
-    if success:
-        job_stats["successful_jobs"] += 1
-    else:
-        job_stats["failed_jobs"] += 1
-    
-    if printer_id not in job_stats["by_printer"]:
-        job_stats["by_printer"][printer_id] = 0
-    job_stats["by_printer"][printer_id] += 1
+    global _jobs_today, _last_reset, _last_reset_date, _last_rollover_check, _stats_response
+    
+    # Reset daily stats if needed. The date comparison only runs once a
+    # minute; in between, a plain float comparison keeps the hot path
+    # free of datetime construction and string formatting
+    now = time.time()
+    if now - _last_rollover_check >= 60:
+        _last_rollover_check = now
+        today = datetime.fromtimestamp(now, timezone.utc).date()
+        if today != _last_reset_date:
+            _jobs_today = itertools.count()
+            _last_reset_date = today
+            _last_reset = today.isoformat()
+    
+    next(_total_jobs)
+    next(_jobs_today)
+    next(_successful_jobs if success else _failed_jobs)
+    next(_jobs_by_printer[printer_id])
+    _stats_response = None
 
 
 # API Endpoints
@@ -152,12 +386,12 @@ async def health_check():
     printers_data = config_manager.get_printers()
     printers = printers_data.get("printers", {})
     
-    # Count online printers
-    printers_online = 0
-    for printer_config in printers.values():
-        status_result = await check_printer_status(printer_config)
-        if status_result == "online":
-            printers_online += 1
+    # Probe all printers concurrently; latency is max(probe) not sum(probe)
+    statuses = await asyncio.gather(
+        *(cached_check_status(config) for config in printers.values()),
+        return_exceptions=True
+    )
+    printers_online = sum(1 for s in statuses if s == "online")
     
     return HealthResponse(
         status="healthy",
@@ -171,12 +405,16 @@ async def health_check():
 @app.get("/api/v1/stats", response_model=StatsResponse, tags=["Health"])
 async def get_stats(token: str = Depends(require_auth)):
     """Get print job statistics."""
-    return StatsResponse(**job_stats)
+    global _stats_response
+    if _stats_response is None:
+        # Counters are internally trusted; construct without validation
+        _stats_response = StatsResponse.model_construct(**stats_snapshot())
+    return _stats_response
 
 
 @app.post("/api/v1/print", response_model=PrintResponse, tags=["Printing"])
 async def submit_print_job(
-    request: PrintRequest,
+    request: PrintRequest = Depends(parse_print_request),
     token: str = Depends(require_auth)
 ):
     """
@@ -189,66 +427,62 @@ async def submit_print_job(
     
     logger.info(f"Received print job {job_id} for printer '{printer_id}'")
     
-    # Get printer configuration
-    printers = config_manager.get_printers()
-    printer_config = printers.get("printers", {}).get(printer_id)
-    
-    if not printer_config:
+    # Look up the handler resolved when the printer was configured
+    entry = _print_handlers.get(printer_id)
+    if entry is None:
+        # The config may have changed outside the API; re-sync once
+        _rebuild_print_handlers()
+        entry = _print_handlers.get(printer_id)
+    
+    if entry is None:
+        # No handler: report the precise failure from the stored config
+        printers = config_manager.get_printers()
+        printer_config = printers.get("printers", {}).get(printer_id)
+        
+        if not printer_config:
+            update_stats(printer_id, False)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Printer '{printer_id}' not found"
+            )
+        
+        printer_type = printer_config.get("type")
+        if printer_type == PrinterType.ZEBRA_RAW:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Printer configuration missing IP address"
+            )
+        if printer_type == PrinterType.CUPS:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Printer configuration missing CUPS name"
+            )
+        
         update_stats(printer_id, False)
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Printer '{printer_id}' not found"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported printer type: {printer_type}"
         )
     
-    printer_type = printer_config.get("type")
+    handler, needs_job_name = entry
     job_name = request.job_name or job_id
     
+    # Bind the content once; the per-copy loop just calls it
+    if needs_job_name:
+        send_one = partial(handler, request.content, job_name)
+    else:
+        send_one = partial(handler, request.content)
+    
     try:
         # Handle multiple copies
         for copy_num in range(request.copies):
-            if printer_type == PrinterType.ZEBRA_RAW:
-                # Send via raw TCP
-                ip = printer_config.get("ip")
-                port = printer_config.get("port", 9100)
-                
-                if not ip:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="Printer configuration missing IP address"
-                    )
-                
-                result = await send_zpl_raw(ip, port, request.content)
-                
-                if not result.get("success"):
-                    update_stats(printer_id, False)
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=result.get("message", "Failed to send print job")
-                    )
-                    
-            elif printer_type == PrinterType.CUPS:
-                # Send via CUPS
-                cups_name = printer_config.get("cups_name")
-                
-                if not cups_name:
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail="Printer configuration missing CUPS name"
-                    )
-                
-                result = await send_to_cups(cups_name, request.content, job_name)
-                
-                if not result.get("success"):
-                    update_stats(printer_id, False)
-                    raise HTTPException(
-                        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                        detail=result.get("message", "Failed to send print job")
-                    )
-            else:
+            result = await send_one()
+            
+            if not result.get("success"):
                 update_stats(printer_id, False)
                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Unsupported printer type: {printer_type}"
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=result.get("message", "Failed to send print job")
                 )
         
         update_stats(printer_id, True)
@@ -275,21 +509,23 @@ async def submit_print_job(
 async def list_printers(token: str = Depends(require_auth)):
     """List all configured printers with their status."""
     printers_data = config_manager.get_printers()
-    printers = printers_data.get("printers", {})
+    printers = list(printers_data.get("printers", {}).items())
     
-    printer_list = []
-    for printer_id, printer_config in printers.items():
-        # Check printer status
-        status_result = await check_printer_status(printer_config)
-        
-        printer_list.append(PrinterInfo(
+    # Check all printer statuses concurrently
+    statuses = await asyncio.gather(
+        *(cached_check_status(config) for _, config in printers)
+    )
+    
+    now_iso = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    return [
+        PrinterInfo(
             id=printer_id,
-            config=PrinterConfig(**printer_config),
+            config=PrinterConfig.model_construct(**printer_config),
             status=PrinterStatus(status_result),
-            last_check=datetime.utcnow().isoformat()
-        ))
-    
-    return printer_list
+            last_check=now_iso
+        )
+        for (printer_id, printer_config), status_result in zip(printers, statuses)
+    ]
 
 
 @app.post("/api/v1/printers", status_code=status.HTTP_201_CREATED, tags=["Printers"])
@@ -317,6 +553,9 @@ async def add_printer(
     
     # Add printer to configuration
     config_manager.add_printer(printer_id, printer_config)
+    _rebuild_print_handlers()
+    _invalidate_status_cache()
+    _invalidate_setup_status_cache()
     
     logger.info(f"Added printer '{printer_id}' of type '{printer_config['type']}'")
     
@@ -360,6 +599,8 @@ async def update_printer(
     
     # Update printer configuration
     config_manager.update_printer(printer_id, printer_config)
+    _rebuild_print_handlers()
+    _invalidate_status_cache()
     
     logger.info(f"Updated printer '{printer_id}' of type '{printer_config['type']}'")
     
@@ -377,6 +618,9 @@ async def remove_printer(
 ):
     """Remove a printer configuration."""
     success = config_manager.remove_printer(printer_id)
+    _rebuild_print_handlers()
+    _invalidate_status_cache()
+    _invalidate_setup_status_cache()
     
     if not success:
         raise HTTPException(
@@ -406,7 +650,8 @@ async def discover_printers(
     
     discovered = await discover_zebra_printers(ip_range)
     
-    return [DiscoveredPrinter(**printer) for printer in discovered]
+    # Scan results were built by our own probe; skip re-validation
+    return [DiscoveredPrinter.model_construct(**printer) for printer in discovered]
 
 
 @app.post("/api/v1/setup/token", tags=["Setup"])
@@ -416,7 +661,12 @@ async def generate_token():
     
     This endpoint is available during initial setup without authentication.
     """
+    # Land any staged deletions first: generate_api_token appends to
+    # tokens.json directly, and a later debounced flush would overwrite
+    # its write and silently revoke the token we are about to hand out
+    _flush_tokens()
     token = config_manager.generate_api_token()
+    _invalidate_setup_status_cache()
     
     logger.info("Generated new API token")
     
@@ -431,6 +681,7 @@ async def generate_token():
 async def complete_setup():
     """Mark initial setup as completed."""
     config_manager.mark_setup_completed()
+    _invalidate_setup_status_cache()
     
     logger.info("Setup marked as completed")
     
@@ -443,14 +694,24 @@ async def complete_setup():
 @app.get("/api/v1/setup/status", tags=["Setup"])
 async def setup_status():
     """Check if setup is completed."""
-    is_completed = config_manager.is_setup_completed()
-    config = config_manager.get_config()
+    global _setup_status_cache
+    
+    now = time.monotonic()
+    cached = _setup_status_cache
+    if cached is None or now >= cached[1]:
+        payload = {
+            "setup_completed": config_manager.is_setup_completed(),
+            "has_tokens": len(config_manager.get_api_tokens()) > 0,
+            "printers_configured": len(config_manager.get_printers().get("printers", {}))
+        }
+        cached = (payload, now + SETUP_STATUS_TTL)
+        _setup_status_cache = cached
     
-    return {
-        "setup_completed": is_completed,
-        "has_tokens": len(config.get("security", {}).get("api_tokens", [])) > 0,
-        "printers_configured": len(config_manager.get_printers().get("printers", {}))
-    }
+    # Let polling UIs cache it client-side for the same window
+    return DefaultResponse(
+        content=cached[0],
+        headers={"Cache-Control": f"public, max-age={int(SETUP_STATUS_TTL)}"}
+    )
 
 
 @app.post("/api/v1/security/token/regenerate", tags=["Security"])
@@ -459,6 +720,9 @@ async def regenerate_api_token(token: str = Depends(require_auth)):
     Generate a new API token (requires authentication with existing token).
     The old token will remain valid until you delete it.
     """
+    # Land any staged deletions first so the debounced flush can't
+    # overwrite the append we're about to make (see generate_token)
+    _flush_tokens()
     new_token = config_manager.generate_api_token()
     
     logger.info("Generated additional API token")
@@ -476,16 +740,21 @@ async def list_api_tokens(token: str = Depends(require_auth)):
     List all API tokens (masked for security).
     """
     config = config_manager.get_config()
-    tokens = config.get("security", {}).get("api_tokens", [])
+    tokens = _current_tokens()
+    
+    # Hoist the nested lookups out of the loop; each .get chain on a miss
+    # allocated a fresh empty dict per token
+    created_at = (config.get("security") or {}).get("token_created_at") or {}
     
     # Mask tokens for security
-    masked_tokens = []
-    for i, tok in enumerate(tokens):
-        masked_tokens.append({
+    masked_tokens = [
+        {
             "id": i,
             "token": tok[:8] + "..." + tok[-4:] if len(tok) > 12 else "***",
-            "created_at": config.get("security", {}).get("token_created_at", {}).get(str(i), "unknown")
-        })
+            "created_at": created_at.get(str(i), "unknown")
+        }
+        for i, tok in enumerate(tokens)
+    ]
     
     return {
         "tokens": masked_tokens,
@@ -499,8 +768,7 @@ async def delete_api_token(token_index: int, token: str = Depends(require_auth))
     Delete a specific API token by index.
     Warning: Cannot delete the last token or the token being used for this request.
     """
-    config = config_manager.get_config()
-    tokens = config.get("security", {}).get("api_tokens", [])
+    tokens = _current_tokens()
     
     if len(tokens) <= 1:
         raise HTTPException(
@@ -514,17 +782,23 @@ async def delete_api_token(token_index: int, token: str = Depends(require_auth))
             detail="Token index not found"
         )
     
-    # Check if trying to delete the token currently being used
-    if tokens[token_index] == token:
+    # Check if trying to delete the token currently being used.
+    # compare_digest keeps the comparison constant-time.
+    if hmac.compare_digest(tokens[token_index], token):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot delete the token currently in use. Please use another token."
         )
     
-    # Remove the token
+    # Remove the token; the write is debounced so bulk deletions cost
+    # one file write rather than one per request
     deleted_token = tokens.pop(token_index)
-    config_manager.update_security_config({"api_tokens": tokens})
-    
+    _schedule_token_flush(tokens)
+    # Evict the revoked token from the validation cache immediately;
+    # _flush_tokens clears the cache again once the new list is on
+    # disk, in case a request re-cached it during the debounce window
+    security_manager.invalidate_token(deleted_token)
+
     logger.info(f"Deleted API token at index {token_index}")
     
     return {
@@ -538,7 +812,7 @@ async def delete_api_token(token_index: int, token: str = Depends(require_auth))
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """Handle HTTP exceptions with consistent format."""
-    return JSONResponse(
+    return DefaultResponse(
         status_code=exc.status_code,
         content={
             "error": True,
@@ -552,7 +826,7 @@ async def http_exception_handler(request: Request, exc: HTTPException):
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle unexpected exceptions."""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
-    return JSONResponse(
+    return DefaultResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": True,
@@ -610,7 +884,7 @@ async def list_versions(token: str = Depends(require_auth)):
     
     # Add server versions
     for ver in available_versions:
-        version_map[ver["version"]] = VersionInfo(**ver)
+        version_map[ver["version"]] = VersionInfo.model_construct(**ver)
     
     # Add any installed versions not on server
     for ver in installed:
@@ -624,14 +898,13 @@ async def list_versions(token: str = Depends(require_auth)):
                 is_current=(ver == current)
             )
     
-    # Sort by version (descending)
-    versions_list = sorted(
-        version_map.values(),
-        key=lambda v: v.version,
-        reverse=True
-    )
+    # Sort by version (descending). Parse each version once up front so
+    # the sort compares precomputed PEP 440 keys rather than raw strings,
+    # which would order "1.10.0" before "1.2.0".
+    keyed = [(_version_sort_key(v.version), v) for v in version_map.values()]
+    keyed.sort(key=lambda kv: kv[0], reverse=True)
     
-    return versions_list
+    return [v for _, v in keyed]
 
 
 @app.post("/api/v1/system/update/{version}", tags=["System"])
@@ -771,7 +1044,7 @@ async def get_changelog(
 async def get_update_config(token: str = Depends(require_auth)):
     """Get current update configuration."""
     config = config_manager.get_update_config()
-    return UpdateConfig(**config)
+    return UpdateConfig.model_construct(**config)
 
 
 @app.put("/api/v1/system/update-config", tags=["System"])
@@ -794,28 +1067,26 @@ async def get_service_status(token: str = Depends(require_auth)):
     Get service status (systemd status, uptime, etc).
     """
     try:
-        import subprocess
-        
         # Check if running under systemd
         try:
-            result = subprocess.run(
-                ["systemctl", "is-active", "cloudprintd"],
-                capture_output=True,
-                text=True,
-                timeout=5
+            proc = await asyncio.create_subprocess_exec(
+                "systemctl", "is-active", "cloudprintd",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
-            systemd_status = result.stdout.strip()
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=5)
+            systemd_status = stdout.decode().strip()
             
             # Get detailed status
-            status_result = subprocess.run(
-                ["systemctl", "status", "cloudprintd", "--no-pager"],
-                capture_output=True,
-                text=True,
-                timeout=5
+            status_proc = await asyncio.create_subprocess_exec(
+                "systemctl", "status", "cloudprintd", "--no-pager",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
-            status_output = status_result.stdout
+            stdout, _ = await asyncio.wait_for(status_proc.communicate(), timeout=5)
+            status_output = stdout.decode()
             
-        except (subprocess.SubprocessError, FileNotFoundError):
+        except (OSError, asyncio.TimeoutError):
             systemd_status = "not-available"
             status_output = "systemctl not available or service not installed"
         
@@ -848,14 +1119,14 @@ async def restart_service(token: str = Depends(require_auth)):
     Note: This endpoint may not return a response if the restart is immediate.
     """
     try:
-        import subprocess
-        
-        # Try to restart via systemd
+        # Try to restart via systemd. The child is deliberately not awaited:
+        # the restart may take this process down before it exits.
         try:
-            subprocess.Popen(
-                ["systemctl", "restart", "cloudprintd"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
+            await asyncio.create_subprocess_exec(
+                "systemctl", "restart", "cloudprintd",
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL
             )
             
             return {
@@ -863,7 +1134,7 @@ async def restart_service(token: str = Depends(require_auth)):
                 "message": "Restart command issued. Service will restart shortly."
             }
             
-        except (subprocess.SubprocessError, FileNotFoundError):
+        except OSError:
             # If systemd not available, suggest manual restart
             return {
                 "success": False,
@@ -891,9 +1162,6 @@ async def get_service_logs(
         lines: Number of log lines to retrieve (default 100, max 500)
     """
     try:
-        import subprocess
-        from pathlib import Path
-        
         # Limit lines
         lines = min(lines, 500)
         
@@ -901,25 +1169,24 @@ async def get_service_logs(
         
         # Try journalctl first
         try:
-            result = subprocess.run(
-                ["journalctl", "-u", "cloudprintd", "-n", str(lines), "--no-pager"],
-                capture_output=True,
-                text=True,
-                timeout=10
+            proc = await asyncio.create_subprocess_exec(
+                "journalctl", "-u", "cloudprintd", "-n", str(lines), "--no-pager",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
             )
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=10)
             
-            if result.returncode == 0:
-                logs = result.stdout.split('\n')
+            if proc.returncode == 0:
+                logs = stdout.decode().split('\n')
             
-        except (subprocess.SubprocessError, FileNotFoundError):
+        except (OSError, asyncio.TimeoutError):
             pass
         
         # Fallback to log files if journalctl not available
         if not logs:
             log_file = Path("/home/cloudprintd/logs/cloudprintd.log")
             if log_file.exists():
-                with open(log_file, 'r') as f:
-                    logs = f.readlines()[-lines:]
+                logs = await asyncio.to_thread(_tail_log_file, log_file, lines)
             else:
                 logs = ["Log files not found"]
         
@@ -1,7 +1,7 @@
 """
 Pydantic models for request and response validation.
 """
-from typing import Optional, Dict, List, Any
+from typing import Annotated, Optional, Dict, List, Any
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -33,7 +33,7 @@ class PrintRequest(BaseModel):
     printer: str = Field(..., description="Printer identifier")
     content: str = Field(..., description="Print content (ZPL, PDF base64, or text)")
     format: PrintFormat = Field(default=PrintFormat.ZPL, description="Content format")
-    copies: int = Field(default=1, ge=1, le=100, description="Number of copies")
+    copies: Annotated[int, Field(ge=1, le=100, description="Number of copies")] = 1
     job_name: Optional[str] = Field(default=None, description="Optional job name")
 
 
@@ -55,6 +55,10 @@ class PrinterConfig(BaseModel):
     port: Optional[int] = Field(default=9100, description="TCP port for raw printers")
     # CUPS-specific fields
     cups_name: Optional[str] = Field(default=None, description="CUPS printer name")
+    batch_window_ms: Annotated[Optional[int], Field(
+        ge=10, le=5000,
+        description="Coalesce jobs arriving within this window into one submission"
+    )] = None
 
 
 class PrinterInfo(BaseModel):
@@ -117,6 +121,6 @@ class UpdateConfig(BaseModel):
     """Update configuration model."""
     auto_update: bool = Field(..., description="Enable automatic updates")
     channel: str = Field(..., description="Release channel (stable/beta/dev)")
-    check_interval_hours: int = Field(..., ge=1, le=168, description="Update check interval")
-    keep_previous_versions: int = Field(..., ge=1, le=5, description="Number of versions to keep")
+    check_interval_hours: Annotated[int, Field(ge=1, le=168, description="Update check interval")]
+    keep_previous_versions: Annotated[int, Field(ge=1, le=5, description="Number of versions to keep")]
     update_server: str = Field(..., description="Update server URL")
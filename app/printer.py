@@ -2,22 +2,102 @@
 Printer communication functions for Zebra ZPL and CUPS printers.
 """
 import asyncio
+import errno
+import os
+import selectors
 import socket
 import logging
-from typing import Dict, Any, Optional
+import tempfile
+import threading
+import time
+
+try:
+    import cups
+except ImportError:
+    cups = None
+from typing import Dict, Any, Iterable, Optional, Set, Union
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Shared CUPS connection plus a short-TTL snapshot of cupsd's printer
+# table; each getPrinters() is an IPP round-trip, so polling dashboards
+# would otherwise pay one per printer per refresh
+CUPS_PRINTERS_TTL = 2.0
+_cups_lock = threading.Lock()
+_cups_conn = None
+_cups_printers_cache: tuple = (0.0, None)
+
+
+def _get_cups_printers() -> Dict[str, Any]:
+    """
+    Return cupsd's printer table, cached for a short TTL.
+    
+    Synchronous (pycups is blocking); call via asyncio.to_thread. The
+    lock also serialises access to the shared connection, which is not
+    thread-safe.
+    """
+    global _cups_conn, _cups_printers_cache
+    
+    with _cups_lock:
+        now = time.monotonic()
+        ts, printers = _cups_printers_cache
+        if printers is not None and now - ts < CUPS_PRINTERS_TTL:
+            return printers
+        
+        if _cups_conn is None:
+            _cups_conn = cups.Connection()
+        try:
+            printers = _cups_conn.getPrinters()
+        except Exception:
+            # cupsd may have restarted; reconnect once before giving up
+            _cups_conn = cups.Connection()
+            printers = _cups_conn.getPrinters()
+        
+        _cups_printers_cache = (time.monotonic(), printers)
+        return printers
+
+
+# Pooled connections per (ip, port): back-to-back label jobs reuse one
+# TCP session instead of paying a handshake per job
+ZEBRA_POOL_IDLE_TIMEOUT = 30.0
+ZEBRA_POOL_SIZE = 2
+_zebra_pool: Dict[tuple, list] = {}
+
+
+def _zebra_pool_get(ip: str, port: int):
+    """Pop a live pooled connection, discarding closed or stale ones."""
+    entries = _zebra_pool.get((ip, port))
+    now = time.monotonic()
+    while entries:
+        reader, writer, last_used = entries.pop()
+        if writer.is_closing() or now - last_used > ZEBRA_POOL_IDLE_TIMEOUT:
+            writer.close()
+            continue
+        return reader, writer
+    return None
 
-async def send_zpl_raw(ip: str, port: int, zpl: str, timeout: int = 10) -> Dict[str, Any]:
+
+def _zebra_pool_put(ip: str, port: int, reader, writer) -> None:
+    """Return a connection to the pool, or close it if the pool is full."""
+    if writer.is_closing():
+        return
+    entries = _zebra_pool.setdefault((ip, port), [])
+    if len(entries) >= ZEBRA_POOL_SIZE:
+        writer.close()
+        return
+    entries.append((reader, writer, time.monotonic()))
+
+
+async def send_zpl_raw(ip: str, port: int, zpl: Union[str, bytes],
+                       timeout: int = 10) -> Dict[str, Any]:
     """
     Send ZPL directly to Zebra printer via TCP socket.
     
     Args:
         ip: Printer IP address
         port: TCP port (usually 9100)
-        zpl: ZPL content to print
+        zpl: ZPL content to print, as str or ready-to-send bytes
         timeout: Connection timeout in seconds
         
     Returns:
@@ -26,26 +106,50 @@ async def send_zpl_raw(ip: str, port: int, zpl: str, timeout: int = 10) -> Dict[
     try:
         logger.info(f"Sending ZPL to {ip}:{port}")
         
-        # Create socket connection
-        reader, writer = await asyncio.wait_for(
-            asyncio.open_connection(ip, port),
-            timeout=timeout
-        )
+        # Callers holding the raw request body can pass bytes straight
+        # through; encoding here would copy a multi-MB payload for nothing
+        data = zpl if isinstance(zpl, (bytes, bytearray)) else zpl.encode('utf-8')
+        
+        # Reuse a pooled connection when one is available
+        pooled = _zebra_pool_get(ip, port)
+        if pooled is not None:
+            reader, writer = pooled
+        else:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, port),
+                timeout=timeout
+            )
         
         # Send ZPL data
-        writer.write(zpl.encode('utf-8'))
-        await writer.drain()
+        try:
+            writer.write(data)
+            await writer.drain()
+        except (ConnectionError, OSError):
+            if pooled is None:
+                raise
+            # The idle socket died in the pool; retry once on a fresh one
+            writer.close()
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(ip, port),
+                timeout=timeout
+            )
+            writer.write(data)
+            await writer.drain()
         
         # Wait briefly for any response
         try:
             response = await asyncio.wait_for(reader.read(1024), timeout=2.0)
             response_text = response.decode('utf-8', errors='ignore') if response else ""
         except asyncio.TimeoutError:
+            response = None
             response_text = ""
         
-        # Close connection
-        writer.close()
-        await writer.wait_closed()
+        # An empty read means the printer closed on us; otherwise keep
+        # the session warm for the next job
+        if response == b"":
+            writer.close()
+        else:
+            _zebra_pool_put(ip, port, reader, writer)
         
         logger.info(f"Successfully sent ZPL to {ip}:{port}")
         return {
@@ -98,28 +202,62 @@ async def send_to_cups(printer_name: str, content: str, job_name: str,
     Returns:
         Dictionary with success status and job ID
     """
+    if cups is None:
+        error_msg = "CUPS support not available (pycups not installed)"
+        logger.error(error_msg)
+        return {
+            "success": False,
+            "message": error_msg,
+            "error": "cups_unavailable",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
     try:
-        import cups
-        
         logger.info(f"Sending job '{job_name}' to CUPS printer '{printer_name}'")
         
-        # Connect to CUPS
-        conn = cups.Connection()
+        # Stage the payload once as bytes. On Linux it goes into an
+        # anonymous memfd so the job never touches the SD card; pycups
+        # has no printFd binding, so the descriptor is handed to
+        # printFile via /proc/self/fd. Elsewhere fall back to a temp file.
+        data = content.encode('utf-8') if isinstance(content, str) else content
         
-        # Create a temporary file for the print job
-        import tempfile
-        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.prn') as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
+        fd = None
+        tmp_path = None
+        if hasattr(os, "memfd_create"):
+            fd = os.memfd_create("cups-job", os.MFD_CLOEXEC)
+            
+            def _stage() -> str:
+                os.write(fd, data)
+                os.lseek(fd, 0, os.SEEK_SET)
+                return f"/proc/self/fd/{fd}"
+            
+            job_path = await asyncio.to_thread(_stage)
+        else:
+            def _write_tmp() -> str:
+                with tempfile.NamedTemporaryFile(mode='wb', delete=False, suffix='.prn') as tmp:
+                    tmp.write(data)
+                    return tmp.name
+            
+            tmp_path = await asyncio.to_thread(_write_tmp)
+            job_path = tmp_path
         
         try:
-            # Submit print job
-            job_id = conn.printFile(
-                printer_name,
-                tmp_path,
-                job_name,
-                {}
-            )
+            # Submit print job. pycups blocks on the IPP exchange and its
+            # Connection is not thread-safe, so the shared connection is
+            # only touched inside the lock, off the event loop.
+            def _submit() -> int:
+                global _cups_conn
+                with _cups_lock:
+                    if _cups_conn is None:
+                        _cups_conn = cups.Connection()
+                    return _cups_conn.printFile(
+                        printer_name,
+                        job_path,
+                        job_name,
+                        {}
+                    )
+            
+            job_id = await asyncio.to_thread(_submit)
             
             logger.info(f"CUPS job {job_id} submitted to {printer_name}")
             return {
@@ -130,22 +268,14 @@ async def send_to_cups(printer_name: str, content: str, job_name: str,
                 "timestamp": datetime.utcnow().isoformat()
             }
         finally:
-            # Clean up temporary file
-            import os
-            try:
-                os.unlink(tmp_path)
-            except Exception:
-                pass
+            if fd is not None:
+                os.close(fd)
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except Exception:
+                    pass
                 
-    except ImportError:
-        error_msg = "CUPS support not available (pycups not installed)"
-        logger.error(error_msg)
-        return {
-            "success": False,
-            "message": error_msg,
-            "error": "cups_unavailable",
-            "timestamp": datetime.utcnow().isoformat()
-        }
     except Exception as e:
         error_msg = f"Error printing to CUPS printer '{printer_name}': {str(e)}"
         logger.error(error_msg, exc_info=True)
@@ -157,6 +287,123 @@ async def send_to_cups(printer_name: str, content: str, job_name: str,
         }
 
 
+# Per-printer coalescing queues for thermal label printers: jobs that
+# arrive within a short window are concatenated into one submission so
+# the print head warms up once per burst instead of once per label
+MAX_BATCH_JOBS = 32
+_job_queues: Dict[str, asyncio.Queue] = {}
+_drainers: Dict[str, asyncio.Task] = {}
+# Drain window per printer, re-read each batch so a reconfigured
+# window takes effect without recreating the queue
+_batch_windows: Dict[str, float] = {}
+
+
+def _batch_failure(message: str) -> Dict[str, Any]:
+    """Build the shared failure result for jobs a batch couldn't print."""
+    return {
+        "success": False,
+        "message": message,
+        "error": message,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+async def _drain_queue(printer_name: str) -> None:
+    """Collect jobs for one printer and submit each batch as one job."""
+    queue = _job_queues[printer_name]
+    while True:
+        jobs = [await queue.get()]
+        try:
+            # Let the window elapse so back-to-back jobs join this batch
+            await asyncio.sleep(_batch_windows.get(printer_name, 0.05))
+            while len(jobs) < MAX_BATCH_JOBS:
+                try:
+                    jobs.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            content = "".join(job_content for job_content, _, _ in jobs)
+            if len(jobs) == 1:
+                job_name = jobs[0][1]
+            else:
+                job_name = f"batch-{len(jobs)}-{jobs[0][1]}"
+                logger.info(f"Coalesced {len(jobs)} jobs for '{printer_name}'")
+
+            try:
+                result = await send_to_cups(printer_name, content, job_name)
+            except Exception as e:
+                result = _batch_failure(f"Batch submission failed: {e}")
+        except asyncio.CancelledError:
+            # Torn down mid-batch (printer removed or batching turned
+            # off): fail the held jobs so their callers aren't stranded
+            for _, _, future in jobs:
+                if not future.done():
+                    future.set_result(
+                        _batch_failure("Printer batching torn down"))
+            raise
+
+        for _, _, future in jobs:
+            if not future.done():
+                future.set_result(result)
+
+
+def prune_batch_queues(active_printers: Set[str]) -> None:
+    """
+    Tear down coalescing queues for printers that no longer batch.
+
+    Called when the printer registry changes; without it a removed
+    printer (or one whose batching was disabled) would keep its drainer
+    task parked on queue.get() for the life of the process.
+
+    Args:
+        active_printers: CUPS printer names that still use batching
+    """
+    for printer_name in list(_drainers):
+        if printer_name in active_printers:
+            continue
+        task = _drainers.pop(printer_name)
+        queue = _job_queues.pop(printer_name, None)
+        _batch_windows.pop(printer_name, None)
+        task.cancel()
+        # Fail anything still queued so callers aren't left hanging
+        while queue is not None:
+            try:
+                _, _, future = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if not future.done():
+                future.set_result(
+                    _batch_failure("Printer batching torn down"))
+
+
+async def send_to_cups_batched(printer_name: str, content: str, job_name: str,
+                               *, batch_window_ms: int) -> Dict[str, Any]:
+    """
+    Queue a job for coalesced CUPS submission.
+    
+    Args:
+        printer_name: CUPS printer name
+        content: Content to print
+        job_name: Job name/identifier
+        batch_window_ms: Drain window; jobs arriving within it share one
+            submission
+        
+    Returns:
+        The shared batch result dictionary
+    """
+    _batch_windows[printer_name] = batch_window_ms / 1000.0
+    queue = _job_queues.get(printer_name)
+    if queue is None:
+        queue = _job_queues[printer_name] = asyncio.Queue()
+        _drainers[printer_name] = asyncio.ensure_future(
+            _drain_queue(printer_name)
+        )
+
+    future = asyncio.get_running_loop().create_future()
+    await queue.put((content, job_name, future))
+    return await future
+
+
 async def check_printer_status(config: Dict[str, Any]) -> str:
     """
     Check if printer is online.
@@ -188,10 +435,11 @@ async def check_printer_status(config: Dict[str, Any]) -> str:
                 return "error"
             
             # Check CUPS printer status
+            if cups is None:
+                return "unknown"
+            
             try:
-                import cups
-                conn = cups.Connection()
-                printers = conn.getPrinters()
+                printers = await asyncio.to_thread(_get_cups_printers)
                 
                 if cups_name in printers:
                     printer = printers[cups_name]
@@ -203,9 +451,7 @@ async def check_printer_status(config: Dict[str, Any]) -> str:
                         return "offline"
                 else:
                     return "error"
-                    
-            except ImportError:
-                return "unknown"
+
             except Exception as e:
                 logger.error(f"Error checking CUPS printer status: {e}")
                 return "error"
@@ -249,9 +495,9 @@ async def probe_zebra_printer(ip: str, port: int = 9100, timeout: int = 3) -> bo
             # No response is okay - connection was successful
             has_response = True
         
-        # Close connection
+        # Fire-and-forget close: waiting for the FIN handshake would add
+        # another RTT per probed host for nothing
         writer.close()
-        await writer.wait_closed()
         
         return has_response
         
@@ -262,14 +508,80 @@ async def probe_zebra_printer(ip: str, port: int = 9100, timeout: int = 3) -> bo
         return False
 
 
+def probe_zebra_printers_batch(ips: Iterable[str], port: int = 9100,
+                               timeout: float = 3.0,
+                               batch_size: int = 256) -> Set[str]:
+    """
+    Liveness-check many hosts with connect-only non-blocking sockets.
+    
+    Unlike probe_zebra_printer this never completes the ZPL exchange; it
+    issues non-blocking connects in batches and multiplexes them through
+    a selector, reading SO_ERROR once each socket reports writability.
+    That keeps the per-host cost to a handful of syscalls, which is what
+    makes scanning whole subnets practical.
+    
+    Args:
+        ips: IP addresses to probe
+        port: TCP port to check (default 9100)
+        timeout: Per-batch connection timeout in seconds
+        batch_size: Sockets opened simultaneously per batch
+        
+    Returns:
+        Set of IPs that accepted the connection
+    """
+    alive = set()
+    remaining = list(ips)
+    
+    while remaining:
+        batch, remaining = remaining[:batch_size], remaining[batch_size:]
+        selector = selectors.DefaultSelector()
+        sockets = []
+        
+        try:
+            for ip in batch:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                sockets.append(sock)
+                result = sock.connect_ex((ip, port))
+                if result == 0:
+                    alive.add(ip)
+                elif result in (errno.EINPROGRESS, errno.EWOULDBLOCK):
+                    selector.register(sock, selectors.EVENT_WRITE, ip)
+                # Any other errno means the host is unreachable outright
+            
+            deadline = time.monotonic() + timeout
+            outstanding = len(selector.get_map())
+            
+            while outstanding:
+                wait = deadline - time.monotonic()
+                if wait <= 0:
+                    break
+                for key, _ in selector.select(wait):
+                    selector.unregister(key.fileobj)
+                    outstanding -= 1
+                    err = key.fileobj.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    if err == 0:
+                        alive.add(key.data)
+        finally:
+            selector.close()
+            for sock in sockets:
+                sock.close()
+    
+    return alive
+
+
 async def discover_zebra_printers(ip_range: str = "192.168.1.0/24", 
-                                  port: int = 9100) -> list:
+                                  port: int = 9100,
+                                  concurrency: int = 256,
+                                  timeout: int = 3) -> list:
     """
     Scan network for Zebra printers.
     
     Args:
         ip_range: IP range to scan (CIDR notation)
         port: Port to check (default 9100)
+        concurrency: Maximum probes in flight at once
+        timeout: Per-host connection timeout in seconds
         
     Returns:
         List of discovered printer dictionaries
@@ -283,21 +595,15 @@ async def discover_zebra_printers(ip_range: str = "192.168.1.0/24",
         
         logger.info(f"Scanning {ip_range} for Zebra printers on port {port}")
         
-        # Create tasks for parallel scanning
-        tasks = []
-        ips = []
-        
-        for ip in network.hosts():
-            ip_str = str(ip)
-            ips.append(ip_str)
-            tasks.append(probe_zebra_printer(ip_str, port))
-        
-        # Run probes in parallel with limited concurrency
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Connect-only batch probe off the event loop; the full ZPL ~HI
+        # exchange is reserved for single-host identification
+        hosts = [str(ip) for ip in network.hosts()]
+        alive = await asyncio.to_thread(
+            probe_zebra_printers_batch, hosts, port, float(timeout), concurrency
+        )
         
-        # Collect discovered printers
-        for ip_str, result in zip(ips, results):
-            if isinstance(result, bool) and result:
+        for ip_str in hosts:
+            if ip_str in alive:
                 discovered.append({
                     "ip": ip_str,
                     "port": port,
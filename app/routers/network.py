@@ -3,19 +3,60 @@ Network configuration and WiFi management endpoints.
 Enables WiFi setup without command-line access for commercial hardware products.
 """
 
+import asyncio
+import os
 import subprocess
 import re
+import json
 import logging
-from typing import List, Dict, Any
+import shutil
+import time
+import uuid
+import socket
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
 
+try:
+    import orjson  # noqa: F401 - presence check for ORJSONResponse
+    from fastapi.responses import ORJSONResponse as _ResponseClass
+except ImportError:
+    from fastapi.responses import JSONResponse as _ResponseClass
+
+try:
+    from pyroute2 import IPRoute
+except ImportError:
+    IPRoute = None
+
 # TODO: Implement proper admin authentication
 # from ..auth import require_admin
 
-router = APIRouter(prefix="/network", tags=["network"])
+router = APIRouter(prefix="/network", tags=["network"],
+                   default_response_class=_ResponseClass)
 logger = logging.getLogger(__name__)
 
+# Patterns compiled once at import; these run on every status poll
+_INET_RE = re.compile(r'inet (\d+\.\d+\.\d+\.\d+)')
+_SIGNAL_RE = re.compile(r'Signal level=(-?\d+) dBm')
+_HOSTNAME_RE = re.compile(r'^[a-z0-9-]{1,63}$')
+
+# Security types in precedence order for scan-result flag matching
+_SECURITY_TYPES = ("WPA3", "WPA2", "WPA", "WEP")
+
+# Cap on networks returned by a scan; models are only built for these
+MAX_SCAN_RESULTS = 50
+
+
+@lru_cache(maxsize=32)
+def _ssid_block_pattern(ssid: str) -> re.Pattern:
+    """Compile the wpa_supplicant network-block pattern for an SSID."""
+    return re.compile(
+        rf'network=\{{\s*ssid="{re.escape(ssid)}".*?\}}\s*',
+        flags=re.DOTALL
+    )
+
 
 class NetworkStatus(BaseModel):
     """Current network connection status"""
@@ -54,10 +95,19 @@ class StaticIPConfig(BaseModel):
     dns_servers: List[str] = []
 
 
-def run_command(cmd: List[str], check: bool = True) -> tuple[int, str, str]:
+@lru_cache(maxsize=None)
+def _resolve_binary(name: str) -> str:
+    """Resolve a command name to its full path once per process."""
+    return shutil.which(name) or name
+
+
+async def run_command(cmd: List[str], check: bool = True) -> tuple[int, str, str]:
     """
     Run shell command and return (return_code, stdout, stderr).
     
+    Runs through an asyncio subprocess so slow commands (wpa_cli can
+    take seconds) don't stall the event loop.
+    
     Args:
         cmd: Command and arguments as list
         check: Whether to raise exception on non-zero return code
@@ -66,18 +116,26 @@ def run_command(cmd: List[str], check: bool = True) -> tuple[int, str, str]:
         Tuple of (return_code, stdout, stderr)
     """
     try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30
+        # close_fds=False skips the O(RLIMIT_NOFILE) descriptor walk
+        # before exec; our pipes are CLOEXEC already and none of these
+        # system tools should inherit anything sensitive
+        proc = await asyncio.create_subprocess_exec(
+            _resolve_binary(cmd[0]), *cmd[1:],
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            close_fds=False
         )
-        if check and result.returncode != 0:
-            logger.error(f"Command failed: {' '.join(cmd)}\nStderr: {result.stderr}")
-        return result.returncode, result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        logger.error(f"Command timed out: {' '.join(cmd)}")
-        return -1, "", "Command timed out"
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30)
+        except asyncio.TimeoutError:
+            proc.kill()
+            logger.error(f"Command timed out: {' '.join(cmd)}")
+            return -1, "", "Command timed out"
+        
+        stdout_text, stderr_text = stdout.decode(), stderr.decode()
+        if check and proc.returncode != 0:
+            logger.error(f"Command failed: {' '.join(cmd)}\nStderr: {stderr_text}")
+        return proc.returncode, stdout_text, stderr_text
     except Exception as e:
         logger.error(f"Error running command: {e}")
         return -1, "", str(e)
@@ -89,11 +147,13 @@ async def get_network_status():
     Get current network connection status.
     
     Returns connection type, IP address, WiFi SSID and signal strength.
+    
+    Responses are built with model_construct: every field comes from the
+    kernel or our own parsing, so re-validating on egress buys nothing.
     """
     # Check if in AP mode
-    _, ap_check, _ = run_command(["systemctl", "is-active", "hostapd"], check=False)
-    if ap_check.strip() == "active":
-        return NetworkStatus(
+    if await _is_ap_mode():
+        return NetworkStatus.model_construct(
             connected=False,
             type="ap_mode",
             interface="wlan0",
@@ -102,34 +162,37 @@ async def get_network_status():
             mac_address=_get_mac_address("wlan0")
         )
     
+    # One netlink round-trip (or ip -json call) covers both interfaces
+    snapshot = await _interface_snapshot()
+    
     # Check Ethernet
-    eth_status = _get_interface_status("eth0")
-    if eth_status["connected"]:
-        return NetworkStatus(
+    eth_status = await _get_interface_status("eth0", snapshot)
+    if eth_status.connected:
+        return NetworkStatus.model_construct(
             connected=True,
             type="ethernet",
             interface="eth0",
-            ip=eth_status["ip"],
-            mac_address=eth_status["mac"]
+            ip=eth_status.ip,
+            mac_address=eth_status.mac
         )
     
     # Check WiFi
-    wifi_status = _get_interface_status("wlan0")
-    if wifi_status["connected"]:
+    wifi_status = await _get_interface_status("wlan0", snapshot)
+    if wifi_status.connected:
         # Get WiFi details
-        ssid, signal = _get_wifi_info()
-        return NetworkStatus(
+        ssid, signal = await _get_wifi_info()
+        return NetworkStatus.model_construct(
             connected=True,
             type="wifi",
             interface="wlan0",
-            ip=wifi_status["ip"],
+            ip=wifi_status.ip,
             ssid=ssid,
             signal_strength=signal,
-            mac_address=wifi_status["mac"]
+            mac_address=wifi_status.mac
         )
     
     # No connection
-    return NetworkStatus(
+    return NetworkStatus.model_construct(
         connected=False,
         type="disconnected",
         interface="",
@@ -137,6 +200,91 @@ async def get_network_status():
     )
 
 
+# wpa_supplicant control socket: the same datagram protocol wpa_cli
+# speaks, minus the fork. Requires the server to have access to the
+# control directory (root or the netdev group).
+_WPA_CTRL_PATH = "/var/run/wpa_supplicant/wlan0"
+
+
+def _wpa_ctrl_request(command: str, timeout: float = 5.0) -> Optional[str]:
+    """
+    Send one command over wpa_supplicant's control socket.
+    
+    Synchronous (call via asyncio.to_thread). Returns the reply text, or
+    None if the socket is unavailable so callers can fall back to
+    wpa_cli.
+    """
+    client_path = f"/tmp/cloudprintd_wpa_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        sock.bind(client_path)
+        sock.settimeout(timeout)
+        sock.connect(_WPA_CTRL_PATH)
+        sock.send(command.encode())
+        return sock.recv(65536).decode(errors="replace")
+    except OSError:
+        return None
+    finally:
+        sock.close()
+        try:
+            os.unlink(client_path)
+        except OSError:
+            pass
+
+
+def _wpa_scan_blocking(timeout: float = 12.0) -> Optional[str]:
+    """
+    Run a full scan cycle over wpa_supplicant's control socket.
+
+    SCAN only kicks off an asynchronous scan and returns OK at once, so
+    reading SCAN_RESULTS straight away would serve the previous scan's
+    cache. ATTACH an event socket first and wait for
+    CTRL-EVENT-SCAN-RESULTS before fetching the results.
+
+    Synchronous (call via asyncio.to_thread). Returns the scan_results
+    text, or None if anything fails so callers can fall back to the CLI
+    tools.
+    """
+    client_path = f"/tmp/cloudprintd_wpa_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    attached = False
+    try:
+        sock.bind(client_path)
+        sock.settimeout(timeout)
+        sock.connect(_WPA_CTRL_PATH)
+        sock.send(b"ATTACH")
+        if sock.recv(4096).strip() != b"OK":
+            return None
+        attached = True
+        reply = _wpa_ctrl_request("SCAN")
+        if reply is None:
+            return None
+        # FAIL-BUSY means a scan is already running; its completion
+        # event serves us just as well
+        if "OK" not in reply and "FAIL-BUSY" not in reply:
+            return None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            sock.settimeout(max(0.1, deadline - time.monotonic()))
+            event = sock.recv(65536).decode(errors="replace")
+            if "CTRL-EVENT-SCAN-RESULTS" in event:
+                return _wpa_ctrl_request("SCAN_RESULTS")
+        return None
+    except OSError:
+        return None
+    finally:
+        if attached:
+            try:
+                sock.send(b"DETACH")
+            except OSError:
+                pass
+        sock.close()
+        try:
+            os.unlink(client_path)
+        except OSError:
+            pass
+
+
 @router.get("/scan", response_model=List[WiFiNetwork])
 async def scan_wifi_networks():
     """
@@ -145,20 +293,25 @@ async def scan_wifi_networks():
     Returns list of networks sorted by signal strength.
     Requires WiFi interface to be enabled.
     """
-    # Trigger scan
-    _, _, _ = run_command(["sudo", "iwlist", "wlan0", "scan"], check=False)
-    
-    # Get scan results from wpa_cli
-    code, output, err = run_command(["sudo", "wpa_cli", "-i", "wlan0", "scan_results"], check=False)
-    
-    if code != 0:
-        logger.warning(f"WiFi scan failed: {err}")
-        raise HTTPException(status_code=500, detail="Failed to scan WiFi networks")
+    # Fast path: talk to wpa_supplicant's control socket directly; the
+    # reply format is identical to wpa_cli's, so the parser below is
+    # shared with the fallback
+    output = await asyncio.to_thread(_wpa_scan_blocking)
+
+    if output is None:
+        # Control socket unavailable; fall back to forking the CLI tools
+        _, _, _ = await run_command(["sudo", "iwlist", "wlan0", "scan"], check=False)
+        
+        code, output, err = await run_command(["sudo", "wpa_cli", "-i", "wlan0", "scan_results"], check=False)
+        
+        if code != 0:
+            logger.warning(f"WiFi scan failed: {err}")
+            raise HTTPException(status_code=500, detail="Failed to scan WiFi networks")
     
-    networks = []
+    parsed = []
     seen_ssids = set()
     
-    # Parse scan results
+    # Parse scan results into plain tuples first
     # Format: bssid / frequency / signal level / flags / ssid
     lines = output.strip().split('\n')[1:]  # Skip header
     for line in lines:
@@ -173,33 +326,29 @@ async def scan_wifi_networks():
             continue
         seen_ssids.add(ssid)
         
-        # Parse security type
-        security = "Open"
-        if "WPA3" in flags:
-            security = "WPA3"
-        elif "WPA2" in flags:
-            security = "WPA2"
-        elif "WPA" in flags:
-            security = "WPA"
-        elif "WEP" in flags:
-            security = "WEP"
+        parsed.append((int(signal), bssid, int(freq), flags, ssid))
+    
+    # Sort by signal strength (strongest first); response models are
+    # built only for the entries actually returned, without
+    # re-validating fields we just parsed ourselves
+    parsed.sort(key=lambda entry: entry[0], reverse=True)
+    
+    networks = []
+    for signal_dbm, bssid, freq, flags, ssid in parsed[:MAX_SCAN_RESULTS]:
+        security = next((s for s in _SECURITY_TYPES if s in flags), "Open")
         
         # Convert signal to quality (0-100)
-        signal_dbm = int(signal)
         quality = min(100, max(0, (signal_dbm + 100) * 2))
         
-        networks.append(WiFiNetwork(
+        networks.append(WiFiNetwork.model_construct(
             ssid=ssid,
             bssid=bssid,
             signal=signal_dbm,
-            frequency=int(freq),
+            frequency=freq,
             security=security,
             quality=quality
         ))
     
-    # Sort by signal strength (strongest first)
-    networks.sort(key=lambda n: n.signal, reverse=True)
-    
     return networks
 
 
@@ -240,7 +389,7 @@ network={{
     
     try:
         # Backup existing config
-        run_command([
+        await run_command([
             "sudo", "cp", 
             "/etc/wpa_supplicant/wpa_supplicant.conf",
             "/etc/wpa_supplicant/wpa_supplicant.conf.backup"
@@ -251,8 +400,7 @@ network={{
             existing_config = f.read()
         
         # Remove any existing network blocks for same SSID
-        pattern = rf'network=\{{\s*ssid="{re.escape(config.ssid)}".*?\}}\s*'
-        cleaned_config = re.sub(pattern, '', existing_config, flags=re.DOTALL)
+        cleaned_config = _ssid_block_pattern(config.ssid).sub('', existing_config)
         
         # Append new network block
         new_config = cleaned_config.rstrip() + "\n" + network_block
@@ -262,23 +410,23 @@ network={{
             f.write(new_config)
         
         # Move to proper location
-        run_command([
+        await run_command([
             "sudo", "mv",
             "/tmp/wpa_supplicant.conf.new",
             "/etc/wpa_supplicant/wpa_supplicant.conf"
         ])
         
-        run_command([
+        await run_command([
             "sudo", "chmod", "600",
             "/etc/wpa_supplicant/wpa_supplicant.conf"
         ])
         
         # Stop hostapd if running (exit AP mode)
-        run_command(["sudo", "systemctl", "stop", "hostapd"], check=False)
-        run_command(["sudo", "systemctl", "stop", "dnsmasq"], check=False)
+        await run_command(["sudo", "systemctl", "stop", "hostapd"], check=False)
+        await run_command(["sudo", "systemctl", "stop", "dnsmasq"], check=False)
         
         # Reconfigure wpa_supplicant
-        run_command(["sudo", "wpa_cli", "-i", "wlan0", "reconfigure"], check=False)
+        await run_command(["sudo", "wpa_cli", "-i", "wlan0", "reconfigure"], check=False)
         
         # Reboot to ensure clean connection
         logger.info(f"WiFi configured for SSID: {config.ssid}. Rebooting in 5 seconds...")
@@ -296,7 +444,7 @@ network={{
     except Exception as e:
         logger.error(f"Failed to configure WiFi: {e}")
         # Restore backup if exists
-        run_command([
+        await run_command([
             "sudo", "cp",
             "/etc/wpa_supplicant/wpa_supplicant.conf.backup",
             "/etc/wpa_supplicant/wpa_supplicant.conf"
@@ -322,13 +470,13 @@ country=US
         with open("/tmp/wpa_supplicant.conf", "w") as f:
             f.write(base_config)
         
-        run_command([
+        await run_command([
             "sudo", "mv",
             "/tmp/wpa_supplicant.conf",
             "/etc/wpa_supplicant/wpa_supplicant.conf"
         ])
         
-        run_command([
+        await run_command([
             "sudo", "chmod", "600",
             "/etc/wpa_supplicant/wpa_supplicant.conf"
         ])
@@ -351,7 +499,7 @@ country=US
 @router.get("/hostname")
 async def get_hostname():
     """Get current hostname"""
-    code, output, _ = run_command(["hostname"], check=False)
+    code, output, _ = await run_command(["hostname"], check=False)
     if code == 0:
         return {"hostname": output.strip()}
     return {"hostname": "unknown"}
@@ -366,7 +514,7 @@ async def set_hostname(hostname: str):
     Requires admin authentication and reboot to take effect.
     """
     # Validate hostname
-    if not re.match(r'^[a-z0-9-]{1,63}$', hostname.lower()):
+    if not _HOSTNAME_RE.match(hostname.lower()):
         raise HTTPException(
             status_code=400,
             detail="Invalid hostname. Use only lowercase letters, numbers, and hyphens (1-63 chars)"
@@ -376,10 +524,10 @@ async def set_hostname(hostname: str):
         # Update /etc/hostname
         with open("/tmp/hostname", "w") as f:
             f.write(hostname + "\n")
-        run_command(["sudo", "mv", "/tmp/hostname", "/etc/hostname"])
+        await run_command(["sudo", "mv", "/tmp/hostname", "/etc/hostname"])
         
         # Update /etc/hosts
-        code, hosts_content, _ = run_command(["cat", "/etc/hosts"])
+        code, hosts_content, _ = await run_command(["cat", "/etc/hosts"])
         if code == 0:
             # Replace old hostname with new
             lines = hosts_content.split('\n')
@@ -392,10 +540,10 @@ async def set_hostname(hostname: str):
             
             with open("/tmp/hosts", "w") as f:
                 f.write('\n'.join(new_lines))
-            run_command(["sudo", "mv", "/tmp/hosts", "/etc/hosts"])
+            await run_command(["sudo", "mv", "/tmp/hosts", "/etc/hosts"])
         
         # Apply immediately
-        run_command(["sudo", "hostnamectl", "set-hostname", hostname], check=False)
+        await run_command(["sudo", "hostnamectl", "set-hostname", hostname], check=False)
         
         return {
             "success": True,
@@ -410,56 +558,172 @@ async def set_hostname(hostname: str):
 
 # Helper functions
 
-def _get_interface_status(interface: str) -> Dict[str, Any]:
+@dataclass(slots=True, frozen=True)
+class _IfaceStatus:
+    """Interface state snapshot; slots keep per-poll allocations small."""
+    connected: bool
+    ip: str
+    mac: str
+
+
+# hostapd state changes on the order of minutes; dashboards poll every
+# second, so a short TTL saves a fork per poll
+_AP_MODE_TTL = 5.0
+_ap_mode_cache = (0.0, False)
+
+
+async def _is_ap_mode() -> bool:
+    """Check whether hostapd is active, cached for a short TTL."""
+    global _ap_mode_cache
+    now = time.monotonic()
+    ts, active = _ap_mode_cache
+    if now - ts < _AP_MODE_TTL:
+        return active
+    
+    _, output, _ = await run_command(["systemctl", "is-active", "hostapd"], check=False)
+    active = output.strip() == "active"
+    _ap_mode_cache = (now, active)
+    return active
+
+
+_ipr = None
+
+
+def _netlink_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Fetch interface state over netlink; empty dict if unavailable."""
+    global _ipr
+    if IPRoute is None:
+        return {}
+    
+    try:
+        if _ipr is None:
+            _ipr = IPRoute()
+        
+        interfaces: Dict[str, Dict[str, Any]] = {}
+        index_to_name: Dict[int, str] = {}
+        for link in _ipr.get_links():
+            ifname = link.get_attr('IFLA_IFNAME')
+            if not ifname:
+                continue
+            index_to_name[link['index']] = ifname
+            interfaces[ifname] = {
+                "state": link.get_attr('IFLA_OPERSTATE') or "",
+                "ip": "",
+                "mac": link.get_attr('IFLA_ADDRESS') or ""
+            }
+        
+        for addr in _ipr.get_addr(family=socket.AF_INET):
+            ifname = index_to_name.get(addr['index'])
+            if ifname and not interfaces[ifname]["ip"]:
+                interfaces[ifname]["ip"] = (
+                    addr.get_attr('IFA_LOCAL') or addr.get_attr('IFA_ADDRESS') or ""
+                )
+        
+        return interfaces
+    except Exception as e:
+        logger.warning(f"Netlink query failed, falling back to ip: {e}")
+        return {}
+
+
+async def _interface_snapshot() -> Dict[str, Dict[str, Any]]:
+    """Snapshot all interfaces: netlink when available, else `ip -json`."""
+    return _netlink_snapshot() or await _ip_addr_json()
+
+
+async def _ip_addr_json() -> Dict[str, Dict[str, Any]]:
+    """Fetch state for every interface with a single `ip -json addr` call."""
+    code, output, _ = await run_command(["ip", "-json", "addr"], check=False)
+    interfaces: Dict[str, Dict[str, Any]] = {}
+    if code != 0:
+        return interfaces
+    
+    try:
+        parsed = json.loads(output)
+    except ValueError:
+        return interfaces
+    
+    for entry in parsed:
+        ifname = entry.get("ifname")
+        if not ifname:
+            continue
+        ip = ""
+        for addr in entry.get("addr_info", []):
+            if addr.get("family") == "inet":
+                ip = addr.get("local", "")
+                break
+        interfaces[ifname] = {
+            "state": entry.get("operstate", ""),
+            "ip": ip,
+            "mac": entry.get("address", "")
+        }
+    return interfaces
+
+
+async def _get_interface_status(interface: str,
+                                snapshot: Dict[str, Dict[str, Any]] = None) -> _IfaceStatus:
     """Get status of network interface"""
-    # Check if interface exists and is up
-    code, output, _ = run_command(["ip", "link", "show", interface], check=False)
+    if snapshot is None:
+        snapshot = await _interface_snapshot()
+    
+    if snapshot:
+        info = snapshot.get(interface)
+        if info is None:
+            return _IfaceStatus(connected=False, ip="", mac="")
+        is_up = info["state"] in ("UP", "UNKNOWN")
+        return _IfaceStatus(
+            connected=bool(info["ip"]) and is_up,
+            ip=info["ip"],
+            mac=info["mac"]
+        )
+    
+    # Fallback for iproute2 builds without JSON output
+    code, output, _ = await run_command(["ip", "link", "show", interface], check=False)
     if code != 0:
-        return {"connected": False, "ip": "", "mac": ""}
+        return _IfaceStatus(connected=False, ip="", mac="")
     
     # Check if state is UP (interface is enabled)
     is_up = "state UP" in output or "state UNKNOWN" in output
     
     # Get IP address
-    code, output, _ = run_command(["ip", "-4", "addr", "show", interface], check=False)
+    code, output, _ = await run_command(["ip", "-4", "addr", "show", interface], check=False)
     ip = ""
     if code == 0:
-        match = re.search(r'inet (\d+\.\d+\.\d+\.\d+)', output)
+        match = _INET_RE.search(output)
         if match:
             ip = match.group(1)
     
-    # Get MAC address
-    mac = _get_mac_address(interface)
-    
-    return {
-        "connected": bool(ip) and is_up,
-        "ip": ip,
-        "mac": mac
-    }
+    return _IfaceStatus(
+        connected=bool(ip) and is_up,
+        ip=ip,
+        mac=_get_mac_address(interface)
+    )
 
 
+@lru_cache(maxsize=8)
 def _get_mac_address(interface: str) -> str:
-    """Get MAC address of interface"""
-    code, output, _ = run_command(["cat", f"/sys/class/net/{interface}/address"], check=False)
-    if code == 0:
-        return output.strip()
-    return ""
+    """Get MAC address of interface (fixed post-boot, so cached forever)"""
+    # sysfs read; no reason to fork cat for this
+    try:
+        with open(f"/sys/class/net/{interface}/address") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
 
 
-def _get_wifi_info() -> tuple[str, int]:
+async def _get_wifi_info() -> tuple[str, int]:
     """Get current WiFi SSID and signal strength"""
     ssid = ""
     signal = 0
     
     # Get SSID
-    code, output, _ = run_command(["iwgetid", "-r"], check=False)
+    code, output, _ = await run_command(["iwgetid", "-r"], check=False)
     if code == 0:
         ssid = output.strip()
     
     # Get signal strength
-    code, output, _ = run_command(["iwconfig", "wlan0"], check=False)
+    code, output, _ = await run_command(["iwconfig", "wlan0"], check=False)
     if code == 0:
-        match = re.search(r'Signal level=(-?\d+) dBm', output)
+        match = _SIGNAL_RE.search(output)
         if match:
             signal = int(match.group(1))
     
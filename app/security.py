@@ -3,8 +3,13 @@ Security middleware and utilities for CloudPrintd.
 """
 from fastapi import HTTPException, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional
+from collections import OrderedDict
+from ipaddress import collapse_addresses, ip_address, ip_network
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import hmac
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -12,8 +17,21 @@ security = HTTPBearer()
 
 
 class SecurityManager:
-    """Manages API authentication and authorization."""
-    
+    """Manages API authentication and authorization.
+
+    The IP whitelist is parsed once — ``ip_network(entry, strict=False)``
+    normalises bare IPs to /32 and /128 — into the prefix-bucket index
+    built by ``_build_whitelist_index``, and reparsed only when the
+    stored whitelist changes. Request handling never constructs network
+    objects or resolves imports; ``ipaddress`` is imported at module
+    load.
+    """
+
+    # Validated-token cache: entries expire after this many seconds and
+    # the cache is capped so it can never grow unbounded
+    TOKEN_CACHE_TTL = 300.0
+    TOKEN_CACHE_SIZE = 1024
+
     def __init__(self, config_manager):
         """
         Initialise security manager.
@@ -22,19 +40,144 @@ class SecurityManager:
             config_manager: ConfigManager instance
         """
         self.config_manager = config_manager
-    
+        # Whitelist match index, rebuilt only when the stored whitelist
+        # changes (the config cache hands back the same list object
+        # until the file is rewritten)
+        self._wl_source: Optional[list] = None
+        self._wl_exact: Dict[int, frozenset] = {}
+        self._wl_buckets: Dict[int, Tuple[Tuple[int, frozenset], ...]] = {}
+        # Snapshot of the security section, refreshed only when the
+        # config manager's change counter moves; steady state is a
+        # single int compare per request instead of a config dict walk
+        self._wl_version: int = -1
+        self._wl_enabled: bool = False
+        # LRU of validated tokens keyed by SHA-256 digest (never the
+        # token itself), mapping to the entry's expiry time
+        self._token_cache: "OrderedDict[bytes, float]" = OrderedDict()
+        # Stored tokens pre-encoded to bytes for constant-time compare,
+        # rebuilt only when the token list changes
+        self._token_source: Optional[Tuple[str, ...]] = None
+        self._token_digests: Tuple[bytes, ...] = ()
+
+    def _build_whitelist_index(self, whitelist: list) -> None:
+        """
+        Pre-parse the whitelist into per-prefix lookup buckets.
+
+        Overlapping and adjacent entries are first merged with
+        ``collapse_addresses`` so operator-entered duplicates don't
+        inflate the index. The survivors are grouped by (IP version,
+        prefix length); each bucket holds a frozenset of masked network
+        addresses. A membership check then costs one mask-and-hash per
+        distinct prefix length instead of re-parsing and scanning the
+        whole whitelist, which makes the auth hot path effectively O(1).
+        Bare IPs — usually most of the whitelist — go into a dedicated
+        frozenset consulted before any masking, so the common case is a
+        single unmasked hash lookup.
+
+        Args:
+            whitelist: Raw whitelist entries (bare IPs or CIDR ranges)
+        """
+        nets_by_version: Dict[int, list] = {4: [], 6: []}
+        for entry in whitelist:
+            try:
+                # ip_network normalises bare IPs to /32 and /128
+                net = ip_network(entry, strict=False)
+            except ValueError:
+                logger.warning(f"Ignoring invalid whitelist entry: {entry}")
+                continue
+            nets_by_version[net.version].append(net)
+
+        grouped: Dict[Tuple[int, int], set] = {}
+        parsed = collapsed = 0
+        for version, nets in nets_by_version.items():
+            parsed += len(nets)
+            for net in collapse_addresses(nets):
+                collapsed += 1
+                grouped.setdefault((version, net.prefixlen), set()).add(
+                    int(net.network_address))
+        if collapsed < parsed:
+            logger.info(
+                f"Collapsed IP whitelist from {parsed} to {collapsed} entries")
+
+        # Split single addresses out of the CIDR buckets entirely
+        self._wl_exact = {
+            4: frozenset(grouped.pop((4, 32), ())),
+            6: frozenset(grouped.pop((6, 128), ())),
+        }
+
+        buckets: Dict[int, List[Tuple[int, frozenset]]] = {4: [], 6: []}
+        for (version, prefixlen) in sorted(grouped, key=lambda k: k[1], reverse=True):
+            max_len = 32 if version == 4 else 128
+            host_bits = max_len - prefixlen
+            mask = ((1 << max_len) - 1) ^ ((1 << host_bits) - 1)
+            buckets[version].append((mask, frozenset(grouped[(version, prefixlen)])))
+        self._wl_buckets = {v: tuple(b) for v, b in buckets.items()}
+
+
     def validate_token(self, token: str) -> bool:
         """
         Validate API token.
-        
+
+        Every stored token is checked with hmac.compare_digest, so the
+        comparison is a single constant-time C call and the outcome
+        leaks no timing information about how far a guess matched.
+
         Args:
             token: Bearer token to validate
-            
+
         Returns:
             True if token is valid
         """
-        return self.config_manager.validate_token(token)
-    
+        tokens = tuple(self.config_manager.get_api_tokens())
+        if tokens != self._token_source:
+            self._token_digests = tuple(t.encode("utf-8") for t in tokens)
+            self._token_source = tokens
+        provided = token.encode("utf-8")
+        return any(hmac.compare_digest(t, provided) for t in self._token_digests)
+
+    def validate_token_cached(self, token: str) -> bool:
+        """
+        Validate an API token, serving repeat callers from a TTL cache.
+
+        Successful validations are remembered (keyed by the token's
+        SHA-256 digest) for TOKEN_CACHE_TTL seconds, so the hot path for
+        an active API key is a single dict lookup instead of a trip
+        through the config layer. Failures are never cached.
+
+        Args:
+            token: Bearer token to validate
+
+        Returns:
+            True if token is valid
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.monotonic()
+        expires = self._token_cache.get(key)
+        if expires is not None:
+            if expires > now:
+                self._token_cache.move_to_end(key)
+                return True
+            del self._token_cache[key]
+        if not self.validate_token(token):
+            return False
+        self._token_cache[key] = now + self.TOKEN_CACHE_TTL
+        while len(self._token_cache) > self.TOKEN_CACHE_SIZE:
+            self._token_cache.popitem(last=False)
+        return True
+
+    def invalidate_token(self, token: Optional[str] = None) -> None:
+        """
+        Drop cached validation state so revoked tokens stop working now.
+
+        Args:
+            token: Specific token to evict, or None to clear the cache
+        """
+        if token is None:
+            self._token_cache.clear()
+        else:
+            self._token_cache.pop(hashlib.sha256(token.encode()).digest(), None)
+
+
     def check_ip_whitelist(self, client_ip: str) -> bool:
         """
         Check if client IP is whitelisted.
@@ -45,34 +188,33 @@ class SecurityManager:
         Returns:
             True if IP is allowed or whitelist is disabled
         """
-        config = self.config_manager.get_config()
-        security_config = config.get("security", {})
-        
-        if not security_config.get("ip_whitelist_enabled", False):
+        if self.config_manager.config_version != self._wl_version:
+            config = self.config_manager.get_config()
+            security_config = config.get("security", {})
+            self._wl_enabled = bool(
+                security_config.get("ip_whitelist_enabled", False))
+            whitelist = security_config.get("ip_whitelist", [])
+            if whitelist is not self._wl_source:
+                self._build_whitelist_index(whitelist)
+                self._wl_source = whitelist
+            # Re-read the counter: get_config may itself have bumped it
+            self._wl_version = self.config_manager.config_version
+
+        if not self._wl_enabled:
             return True
-        
-        whitelist = security_config.get("ip_whitelist", [])
-        
-        # Check if IP is in whitelist
-        from ipaddress import ip_address, ip_network
-        
+
         try:
             client = ip_address(client_ip)
-            for allowed in whitelist:
-                try:
-                    # Support both single IPs and CIDR ranges
-                    if '/' in allowed:
-                        if client in ip_network(allowed, strict=False):
-                            return True
-                    else:
-                        if client == ip_address(allowed):
-                            return True
-                except ValueError:
-                    continue
         except ValueError:
             logger.warning(f"Invalid client IP format: {client_ip}")
             return False
-        
+
+        ipi = int(client)
+        if ipi in self._wl_exact.get(client.version, ()):
+            return True
+        for mask, members in self._wl_buckets.get(client.version, ()):
+            if ipi & mask in members:
+                return True
         return False
 
 
@@ -102,7 +244,7 @@ async def verify_token(
     
     token = credentials.credentials
     
-    if security_manager and not security_manager.validate_token(token):
+    if security_manager and not security_manager.validate_token_cached(token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication token",
@@ -5,18 +5,36 @@ Handles version management, updates, rollbacks, and package installation.
 import os
 import json
 import hashlib
+import mmap
 import tarfile
 import shutil
 import logging
-import subprocess
 import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 
+from packaging.version import InvalidVersion, Version
+
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _version_sort_key(version: str) -> Version:
+    """Parse a version string for sorting, treating unparseable ones as oldest.
+
+    Memoized so each directory name is parsed once across repeated
+    listings instead of once per comparison.
+    """
+    try:
+        return Version(version)
+    except InvalidVersion:
+        return Version("0")
+
+
 class UpdateManager:
     """Manages package updates, installations, and version control."""
     
@@ -38,24 +56,123 @@ class UpdateManager:
         # Ensure directories exist
         self.packages_dir.mkdir(parents=True, exist_ok=True)
         self.downloads_dir.mkdir(parents=True, exist_ok=True)
-        
+
+        # Directory listing cache keyed on the packages dir mtime, so
+        # repeat listings of an unchanged dir cost one stat()
+        self._versions_cache: Optional[tuple] = None
+
+        # Current-version cache keyed on the symlink's lstat mtime
+        self._current_cache: Optional[tuple] = None
+
+        # How long a restarted service gets to report healthy after
+        # activation before we roll back
+        self.startup_grace_s = 30.0
+
+        # Verified-checksum cache keyed on (path, size, mtime), so
+        # files unchanged between releases skip re-hashing; persisted
+        # across restarts
+        self.hash_cache_file = self.base_dir / "hash_cache.json"
+        self._hash_cache: "OrderedDict[str, str]" = self._load_hash_cache()
+
+        # Shared HTTP client, created lazily on first network call
+        self._http: Optional[Any] = None
+
+        # ETag revalidation cache for polled endpoints: key -> (etag,
+        # parsed body). A 304 serves the cached body with no JSON on
+        # the wire.
+        self._etag_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
         logger.info(f"UpdateManager initialised with base_dir: {base_dir}")
     
+    async def _client(self):
+        """
+        Get the shared HTTP client, creating it on first use.
+
+        One persistent client means update-server calls reuse pooled
+        keep-alive connections instead of paying a TCP+TLS handshake
+        and pool setup per request.
+
+        Returns:
+            The shared httpx.AsyncClient
+        """
+        if self._http is None or self._http.is_closed:
+            import httpx
+            self._http = httpx.AsyncClient(
+                timeout=httpx.Timeout(10.0, read=300.0),
+                limits=httpx.Limits(max_keepalive_connections=10)
+            )
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the shared HTTP client (called on application shutdown)."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    # Bound on remembered (endpoint, channel, version) poll targets
+    _ETAG_CACHE_SIZE = 32
+
+    async def _get_json_cached(self, cache_key: tuple, url: str,
+                               params: Dict[str, str]) -> Any:
+        """
+        GET a JSON endpoint with ETag revalidation.
+
+        Sends If-None-Match when a previous response for the same key
+        carried an ETag; a 304 answer serves the cached body, so the
+        steady-state update poll downloads nothing.
+
+        Args:
+            cache_key: Cache identity for this poll target
+            url: Endpoint URL
+            params: Query parameters
+
+        Returns:
+            Parsed JSON response body
+        """
+        client = await self._client()
+        cached = self._etag_cache.get(cache_key)
+        headers = {"If-None-Match": cached[0]} if cached is not None else None
+        response = await client.get(url, params=params, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            self._etag_cache.move_to_end(cache_key)
+            return cached[1]
+        response.raise_for_status()
+        data = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            self._etag_cache[cache_key] = (etag, data)
+            self._etag_cache.move_to_end(cache_key)
+            while len(self._etag_cache) > self._ETAG_CACHE_SIZE:
+                self._etag_cache.popitem(last=False)
+        return data
+
     def get_current_version(self) -> Optional[str]:
         """
         Get the currently active version.
-        
+
+        Reads the symlink target directly with readlink — only the
+        immediate target name is needed, so there is no reason to stat
+        the link and walk the target path with resolve(). The answer is
+        cached under the link's lstat mtime.
+
         Returns:
             Version string or None if no version is active
         """
         try:
-            if self.current_link.is_symlink():
-                target = self.current_link.resolve()
-                return target.name
+            key = os.lstat(self.current_link).st_mtime_ns
+        except OSError:
             return None
-        except Exception as e:
+        cached = self._current_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        try:
+            version = os.path.basename(os.readlink(self.current_link))
+        except OSError as e:
+            # Not a symlink (EINVAL) or it vanished underneath us
             logger.error(f"Error reading current version: {e}")
-            return None
+            version = None
+        self._current_cache = (key, version)
+        return version
     
     def list_installed_versions(self) -> List[str]:
         """
@@ -65,12 +182,24 @@ class UpdateManager:
             List of version strings
         """
         try:
-            versions = []
-            if self.packages_dir.exists():
-                for item in self.packages_dir.iterdir():
-                    if item.is_dir() and item.name != "current":
-                        versions.append(item.name)
-            return sorted(versions, reverse=True)
+            st = os.stat(self.packages_dir)
+            cached = self._versions_cache
+            if cached is not None and cached[0] == st.st_mtime_ns:
+                return list(cached[1])
+            # scandir serves is_dir from the dirent type on most
+            # filesystems, avoiding a stat() per entry
+            with os.scandir(self.packages_dir) as it:
+                versions = [
+                    entry.name for entry in it
+                    if entry.name != "current"
+                    and entry.is_dir(follow_symlinks=False)
+                ]
+            # PEP 440 ordering: lexical sort would put 1.9.0 above 1.10.0
+            versions.sort(key=_version_sort_key, reverse=True)
+            self._versions_cache = (st.st_mtime_ns, versions)
+            return list(versions)
+        except FileNotFoundError:
+            return []
         except Exception as e:
             logger.error(f"Error listing installed versions: {e}")
             return []
@@ -88,23 +217,20 @@ class UpdateManager:
             Update information dictionary or None
         """
         try:
-            import httpx
-            
             current_version = self.get_current_version()
-            
+
             url = f"{update_server}/api/v1/updates"
             params = {
                 "current_version": current_version or "0.0.0",
                 "channel": channel
             }
-            
+
             logger.info(f"Checking for updates from {url}")
-            
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                return response.json()
-                
+
+            return await self._get_json_cached(
+                ("updates", update_server, channel, params["current_version"]),
+                url, params)
+
         except Exception as e:
             logger.error(f"Error checking for updates: {e}")
             return None
@@ -122,26 +248,23 @@ class UpdateManager:
             List of version information dictionaries
         """
         try:
-            import httpx
-            
             url = f"{update_server}/api/v1/versions"
             params = {"channel": channel}
-            
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Mark installed versions
-                installed = self.list_installed_versions()
-                current = self.get_current_version()
-                
-                for version in data.get("versions", []):
-                    version["is_installed"] = version["version"] in installed
-                    version["is_current"] = version["version"] == current
-                
-                return data.get("versions", [])
-                
+
+            data = await self._get_json_cached(
+                ("versions", update_server, channel), url, params)
+
+            # Mark installed versions; frozenset keeps the
+            # membership test O(1) per server-reported version
+            installed = frozenset(self.list_installed_versions())
+            current = self.get_current_version()
+
+            for version in data.get("versions", []):
+                version["is_installed"] = version["version"] in installed
+                version["is_current"] = version["version"] == current
+
+            return data.get("versions", [])
+
         except Exception as e:
             logger.error(f"Error listing available versions: {e}")
             return []
@@ -158,15 +281,15 @@ class UpdateManager:
             Path to downloaded package or None on failure
         """
         try:
-            import httpx
-            
+            import aiofiles
+
             # Get package info
             url = f"{update_server}/api/v1/package/{version}"
-            
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                package_info = response.json()
+
+            client = await self._client()
+            response = await client.get(url)
+            response.raise_for_status()
+            package_info = response.json()
             
             download_url = package_info.get("download_url")
             expected_checksum = package_info.get("checksum")
@@ -184,18 +307,30 @@ class UpdateManager:
             
             logger.info(f"Downloading {download_url} to {package_path}")
             
-            async with httpx.AsyncClient(timeout=300.0) as client:
-                async with client.stream("GET", download_url) as response:
-                    response.raise_for_status()
-                    
-                    with open(package_path, 'wb') as f:
-                        async for chunk in response.aiter_bytes(chunk_size=8192):
-                            f.write(chunk)
-            
+            # Hash while streaming so verification doesn't need a
+            # second full pass over the file after the download
+            sha256 = hashlib.sha256()
+            async with client.stream("GET", download_url) as response:
+                response.raise_for_status()
+
+                # 256 KiB chunks and a 1 MiB write buffer: far
+                # fewer Python-frame entries and write() syscalls
+                # per MB than the former 8 KiB chunks. aiofiles
+                # runs the writes in a worker thread so a slow SD
+                # card flush never stalls the event loop; hashing
+                # stays on the main task (pure CPU).
+                async with aiofiles.open(package_path, 'wb',
+                                         buffering=1 << 20) as f:
+                    if hasattr(os, 'posix_fadvise'):
+                        os.posix_fadvise(f.fileno(), 0, 0,
+                                         os.POSIX_FADV_SEQUENTIAL)
+                    async for chunk in response.aiter_bytes(chunk_size=1 << 18):
+                        await f.write(chunk)
+                        sha256.update(chunk)
+
             # Verify checksum
             if expected_checksum:
-                actual_checksum = self._calculate_checksum(package_path)
-                if actual_checksum != expected_checksum:
+                if sha256.hexdigest() != expected_checksum:
                     logger.error(f"Checksum mismatch for {version}")
                     package_path.unlink()
                     return None
@@ -207,21 +342,55 @@ class UpdateManager:
             logger.error(f"Error downloading package {version}: {e}")
             return None
     
+    # Slice size for the mmap hashing fallback
+    _HASH_BLOCK = 1 << 22
+
+    # Bound on remembered file checksums
+    _HASH_CACHE_SIZE = 10000
+
+    def _load_hash_cache(self) -> "OrderedDict[str, str]":
+        """Load the persisted checksum cache, empty if missing or bad."""
+        try:
+            with open(self.hash_cache_file, 'r') as f:
+                return OrderedDict(json.load(f))
+        except (OSError, ValueError):
+            return OrderedDict()
+
+    def _save_hash_cache(self) -> None:
+        """Persist the checksum cache; best effort, it is only a cache."""
+        try:
+            with open(self.hash_cache_file, 'w') as f:
+                json.dump(dict(self._hash_cache), f)
+        except OSError as e:
+            logger.warning(f"Could not persist hash cache: {e}")
+
     def _calculate_checksum(self, file_path: Path) -> str:
         """
         Calculate SHA256 checksum of a file.
-        
+
+        Hashing multi-hundred-MB packages through an 8 KiB Python read
+        loop was dominated by loop overhead; hashlib.file_digest keeps
+        the whole read/update cycle in C. On older interpreters the
+        fallback feeds the hash from an mmap in 4 MiB slices.
+
         Args:
             file_path: Path to file
-            
+
         Returns:
             Hex digest of checksum
         """
-        sha256 = hashlib.sha256()
         with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(8192), b''):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+            if hasattr(hashlib, 'file_digest'):
+                return hashlib.file_digest(f, 'sha256').hexdigest()
+            sha256 = hashlib.sha256()
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for offset in range(0, len(mm), self._HASH_BLOCK):
+                        sha256.update(mm[offset:offset + self._HASH_BLOCK])
+            except ValueError:
+                # Empty files cannot be mapped; the empty digest is right
+                pass
+            return sha256.hexdigest()
     
     async def install_package(self, package_path: Path, version: str) -> bool:
         """
@@ -236,56 +405,37 @@ class UpdateManager:
         """
         try:
             version_dir = self.packages_dir / version
-            
+
             # Check if version already installed
             if version_dir.exists():
                 logger.warning(f"Version {version} already installed, removing old installation")
-                shutil.rmtree(version_dir)
-            
+                await asyncio.to_thread(shutil.rmtree, version_dir)
+
             # Create version directory
             version_dir.mkdir(parents=True, exist_ok=True)
-            
+            self._versions_cache = None
+
             logger.info(f"Extracting package to {version_dir}")
-            
-            # Extract tarball
-            with tarfile.open(package_path, 'r:gz') as tar:
-                tar.extractall(version_dir)
-            
-            # Read and verify manifest
-            manifest_path = version_dir / "manifest.json"
-            if not manifest_path.exists():
-                logger.error("Package missing manifest.json")
-                shutil.rmtree(version_dir)
+
+            # Extraction and hashing are seconds of blocking CPU and
+            # IO; run them in a worker thread so the event loop keeps
+            # serving health checks and print jobs during an install
+            if not await asyncio.to_thread(
+                    self._extract_and_verify, package_path, version_dir):
                 return False
-            
-            with open(manifest_path, 'r') as f:
-                manifest = json.load(f)
-            
-            # Verify checksums if present
-            checksums = manifest.get("checksums", {})
-            if checksums:
-                logger.info("Verifying package checksums...")
-                for file_path, expected_checksum in checksums.items():
-                    full_path = version_dir / file_path
-                    if full_path.exists():
-                        actual_checksum = self._calculate_checksum(full_path)
-                        if actual_checksum != expected_checksum:
-                            logger.error(f"Checksum mismatch for {file_path}")
-                            shutil.rmtree(version_dir)
-                            return False
-            
+
             # Run pre-install hook if exists
             await self._run_hook(version_dir, "pre-install.sh")
-            
+
             # Set up virtual environment
-            self._setup_virtualenv(version_dir)
-            
+            await self._setup_virtualenv(version_dir)
+
             # Run post-install hook if exists
             await self._run_hook(version_dir, "post-install.sh")
-            
+
             logger.info(f"Successfully installed version {version}")
             return True
-            
+
         except Exception as e:
             logger.error(f"Error installing package {version}: {e}", exc_info=True)
             # Clean up on failure
@@ -293,51 +443,167 @@ class UpdateManager:
             if version_dir.exists():
                 shutil.rmtree(version_dir)
             return False
-    
-    def _setup_virtualenv(self, version_dir: Path) -> None:
+
+    def _extract_and_verify(self, package_path: Path, version_dir: Path) -> bool:
+        """
+        Extract a package and verify its manifest checksums.
+
+        Synchronous on purpose — install_package runs it via
+        asyncio.to_thread.
+
+        Args:
+            package_path: Path to .pbpkg file
+            version_dir: Destination directory
+
+        Returns:
+            True if extraction and verification succeeded
+        """
+        # Extract tarball. 'r|gz' streams the archive in one
+        # sequential pass (no seek/index phase over the compressed
+        # file), and the data filter refuses absolute paths,
+        # traversal and device nodes on interpreters that have it.
+        with open(package_path, 'rb', buffering=1 << 20) as raw:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(raw.fileno(), 0, 0,
+                                 os.POSIX_FADV_SEQUENTIAL)
+            with tarfile.open(fileobj=raw, mode='r|gz',
+                              bufsize=1 << 20) as tar:
+                if hasattr(tarfile, 'data_filter'):
+                    tar.extractall(version_dir, filter='data')
+                else:
+                    tar.extractall(version_dir)
+
+        # Read and verify manifest
+        manifest_path = version_dir / "manifest.json"
+        if not manifest_path.exists():
+            logger.error("Package missing manifest.json")
+            shutil.rmtree(version_dir)
+            return False
+
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        # Verify checksums if present. SHA-256 releases the GIL
+        # inside OpenSSL, so hashing the files from a thread pool
+        # scales with cores instead of summing per-file times.
+        checksums = manifest.get("checksums", {})
+        if checksums:
+            logger.info("Verifying package checksums...")
+            # Files whose (path, size, mtime) already verified to the
+            # expected digest — tar restores archive mtimes, so bytes
+            # shared between releases hit here — skip the hash entirely
+            to_hash: Dict[str, tuple] = {}
+            for file_path, expected in checksums.items():
+                full_path = version_dir / file_path
+                try:
+                    st = full_path.stat()
+                except OSError:
+                    # Missing files were always skipped, keep that
+                    continue
+                key = f"{file_path}:{st.st_size}:{st.st_mtime_ns}"
+                if self._hash_cache.get(key) == expected:
+                    self._hash_cache.move_to_end(key)
+                    continue
+                to_hash[file_path] = (expected, key)
+
+            failed = None
+            verified = []
+            with ThreadPoolExecutor(
+                    max_workers=min(8, os.cpu_count() or 2)) as executor:
+                futures = {
+                    executor.submit(self._calculate_checksum,
+                                    version_dir / file_path): file_path
+                    for file_path in to_hash
+                }
+                for future in as_completed(futures):
+                    file_path = futures[future]
+                    expected, key = to_hash[file_path]
+                    if future.result() != expected:
+                        failed = file_path
+                        break
+                    verified.append((key, expected))
+            if failed is not None:
+                logger.error(f"Checksum mismatch for {failed}")
+                shutil.rmtree(version_dir)
+                return False
+
+            for key, digest in verified:
+                self._hash_cache[key] = digest
+            while len(self._hash_cache) > self._HASH_CACHE_SIZE:
+                self._hash_cache.popitem(last=False)
+            self._save_hash_cache()
+
+        return True
+
+
+    async def _run_checked(self, *cmd: str,
+                           env: Optional[Dict[str, str]] = None) -> None:
+        """
+        Run a command without blocking the event loop, raising on failure.
+
+        Args:
+            cmd: Command and arguments
+            env: Replacement environment, or None to inherit
+
+        Raises:
+            RuntimeError: If the command exits non-zero
+        """
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            env=env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            logger.error(f"Error setting up virtualenv: {stderr.decode()}")
+            raise RuntimeError(f"Command failed: {cmd[0]}")
+
+    async def _setup_virtualenv(self, version_dir: Path) -> None:
         """
         Set up Python virtual environment for a version.
-        
+
+        Both subprocesses run through asyncio so the minutes-long pip
+        install never stalls the event loop.
+
         Args:
             version_dir: Path to version directory
         """
         venv_dir = version_dir / "venv"
         requirements_file = version_dir / "app" / "requirements.txt"
-        
+
         if not requirements_file.exists():
             logger.warning(f"No requirements.txt found in {version_dir}")
             return
-        
-        try:
-            logger.info(f"Creating virtual environment in {venv_dir}")
-            
-            # Create venv
-            subprocess.run(
-                ["python3", "-m", "venv", str(venv_dir)],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            
-            # Get pip path
-            pip_path = venv_dir / "bin" / "pip"
-            if not pip_path.exists():
-                pip_path = venv_dir / "Scripts" / "pip.exe"  # Windows
-            
-            # Install requirements
-            logger.info(f"Installing requirements from {requirements_file}")
-            subprocess.run(
-                [str(pip_path), "install", "-r", str(requirements_file)],
-                check=True,
-                capture_output=True,
-                text=True
-            )
-            
-            logger.info("Virtual environment setup complete")
-            
-        except subprocess.CalledProcessError as e:
-            logger.error(f"Error setting up virtualenv: {e.stderr}")
-            raise
+
+        logger.info(f"Creating virtual environment in {venv_dir}")
+
+        # Create venv; --symlinks links the interpreter instead of
+        # copying it (the default on Windows is copies)
+        await self._run_checked(
+            "python3", "-m", "venv", "--symlinks", str(venv_dir))
+
+        # Get pip path
+        pip_path = venv_dir / "bin" / "pip"
+        if not pip_path.exists():
+            pip_path = venv_dir / "Scripts" / "pip.exe"  # Windows
+
+        # Install requirements through a persistent cache shared by all
+        # versions, so wheels download and build once; later installs
+        # of the same requirement set come from local disk. A local
+        # wheelhouse, if the operator maintains one, is consulted first.
+        pip_env = dict(os.environ)
+        pip_env["PIP_CACHE_DIR"] = str(self.base_dir / "pip-cache")
+        pip_cmd = [str(pip_path), "install", "--prefer-binary",
+                   "-r", str(requirements_file)]
+        wheelhouse = self.base_dir / "wheels"
+        if wheelhouse.is_dir():
+            pip_cmd += ["--find-links", str(wheelhouse)]
+
+        logger.info(f"Installing requirements from {requirements_file}")
+        await self._run_checked(*pip_cmd, env=pip_env)
+
+        logger.info("Virtual environment setup complete")
     
     async def _run_hook(self, version_dir: Path, hook_name: str) -> bool:
         """
@@ -412,7 +678,9 @@ class UpdateManager:
             
             # Atomic rename
             new_link.replace(self.current_link)
-            
+            self._versions_cache = None
+            self._current_cache = None
+
             logger.info(f"Activated version {version}")
             
             # Run migrations if present
@@ -424,14 +692,27 @@ class UpdateManager:
             # Restart service (handled externally)
             logger.info(f"Version {version} activated successfully")
             
-            # Verify health
-            await asyncio.sleep(5)  # Give service time to start
-            if not await self._verify_health():
+            # Verify health: poll with exponential backoff up to the
+            # grace deadline instead of one fixed 5 s sleep, so a fast
+            # restart activates as soon as it reports healthy and a
+            # slow one isn't rolled back prematurely
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.startup_grace_s
+            delay = 0.1
+            healthy = False
+            while loop.time() < deadline:
+                if await self._verify_health():
+                    healthy = True
+                    break
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 2.0)
+
+            if not healthy:
                 logger.error("Health check failed after activation, rolling back")
                 if old_version:
                     await self.rollback_to(old_version)
                 return False
-            
+
             return True
             
         except Exception as e:
@@ -477,15 +758,14 @@ class UpdateManager:
             True if service is healthy
         """
         try:
-            import httpx
-            
             # Try to connect to health endpoint
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get("http://localhost:8000/api/v1/health")
-                response.raise_for_status()
-                data = response.json()
-                return data.get("status") == "healthy"
-                
+            client = await self._client()
+            response = await client.get(
+                "http://localhost:8000/api/v1/health", timeout=5.0)
+            response.raise_for_status()
+            data = response.json()
+            return data.get("status") == "healthy"
+
         except Exception as e:
             logger.error(f"Health check failed: {e}")
             return False
@@ -542,7 +822,8 @@ class UpdateManager:
                     version_dir = self.packages_dir / version
                     logger.info(f"Removing old version {version}")
                     shutil.rmtree(version_dir)
-                    
+                self._versions_cache = None
+
         except Exception as e:
             logger.error(f"Error cleaning up old versions: {e}")
     
@@ -558,15 +839,13 @@ class UpdateManager:
             Changelog text or None
         """
         try:
-            import httpx
-            
             url = f"{update_server}/api/v1/changelog/{version}"
-            
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                return response.text
-                
+
+            client = await self._client()
+            response = await client.get(url)
+            response.raise_for_status()
+            return response.text
+
         except Exception as e:
             logger.error(f"Error fetching changelog for {version}: {e}")
             return None